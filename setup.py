@@ -32,6 +32,7 @@ setup(
     entry_points={
         "console_scripts": [
             "prompt-test=ui.app:main",
+            "prompt-test-worker=src.core.worker:main",
         ],
     },
 )
\ No newline at end of file
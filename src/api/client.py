@@ -0,0 +1,164 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from src.api.providers.claude import ClaudeProvider
+from src.api.providers.openai import OpenAIProvider
+from src.api.providers.goose import GooseProvider
+
+# Environment variables holding comma-separated keys / base URLs for pooled providers
+POOL_ENV = {
+    "claude": ("ANTHROPIC_API_KEYS", "ANTHROPIC_BASE_URLS"),
+    "openai": ("OPENAI_API_KEYS", "OPENAI_BASE_URLS"),
+}
+
+def create_provider(provider_name: str):
+    """
+    Build a provider client by name.
+    When several keys are configured (e.g. ANTHROPIC_API_KEYS=key1,key2) a ProviderPool is returned,
+    balancing calls with POOL_STRATEGY (least_loaded by default, or round_robin).
+    """
+    if provider_name in POOL_ENV:
+        keys_var, urls_var = POOL_ENV[provider_name]
+        keys = _split_env(keys_var)
+        urls = _split_env(urls_var)
+        provider_class = ClaudeProvider if provider_name == "claude" else OpenAIProvider
+        if len(keys) == 1:
+            return provider_class(api_key=keys[0], base_url=urls[0] if urls else None)
+        if len(keys) > 1:
+            providers = [
+                provider_class(api_key=key, base_url=urls[i % len(urls)] if urls else None)
+                for i, key in enumerate(keys)
+            ]
+            for provider in providers:
+                # Surface 429s to the pool right away so it can fail over instead of the SDK retrying the same key
+                provider.client = provider.client.with_options(max_retries=0)
+            return ProviderPool(providers, strategy=os.getenv("POOL_STRATEGY", "least_loaded"))
+
+    if provider_name == "claude":
+        return ClaudeProvider()
+    elif provider_name == "openai":
+        return OpenAIProvider()
+    elif provider_name == "goose":
+        return GooseProvider()
+    raise ValueError(f"Unknown provider: {provider_name}")
+
+def _split_env(name: str) -> List[str]:
+    return [value.strip() for value in os.getenv(name, "").split(",") if value.strip()]
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class _PoolMember:
+    def __init__(self, provider):
+        self.provider = provider
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.consecutive_throttles = 0
+        self.cooling_until = 0.0
+
+class ProviderPool:
+    """
+    Spreads calls across several clients of one provider (one per API key / base URL).
+
+    Each call goes to the least-loaded key (or the next one, with strategy="round_robin").
+    A key that returns 429 is benched for `cooldown` seconds (doubling on repeated 429s,
+    or as long as the server's retry-after asks) and the call is retried on another key.
+    """
+
+    def __init__(self, providers: List[Any], strategy: str = "least_loaded", cooldown: float = 30.0, max_cooldown: float = 300.0):
+        if not providers:
+            raise ValueError("ProviderPool needs at least one provider")
+        if strategy not in ("least_loaded", "round_robin"):
+            raise ValueError(f"Unknown pool strategy: {strategy}")
+        self.members = [_PoolMember(p) for p in providers]
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _pick(self, now: float) -> Optional[_PoolMember]:
+        if self.strategy == "round_robin":
+            for i in range(len(self.members)):
+                candidate = self.members[(self._next + i) % len(self.members)]
+                if candidate.cooling_until <= now:
+                    self._next = (self._next + i + 1) % len(self.members)
+                    return candidate
+            return None
+        available = [m for m in self.members if m.cooling_until <= now]
+        return min(available, key=lambda m: (m.in_flight, m.requests)) if available else None
+
+    def _acquire(self) -> _PoolMember:
+        while True:
+            with self._lock:
+                now = time.time()
+                member = self._pick(now)
+                if member:
+                    member.in_flight += 1
+                    member.requests += 1
+                    return member
+                wait = min(m.cooling_until for m in self.members) - now
+            # Every key is throttled: wait for the first one to come back
+            time.sleep(max(wait, 0.0) + random.uniform(0, 0.1))
+
+    def _call(self, method: str, **kwargs) -> Any:
+        for attempt in range(len(self.members) + 1):
+            member = self._acquire()
+            try:
+                result = getattr(member.provider, method)(**kwargs)
+            except Exception as e:
+                with self._lock:
+                    member.in_flight -= 1
+                    if not is_rate_limited(e):
+                        member.errors += 1
+                        raise
+                    member.throttled += 1
+                    member.consecutive_throttles += 1
+                    backoff = min(self.cooldown * 2 ** (member.consecutive_throttles - 1), self.max_cooldown)
+                    member.cooling_until = time.time() + max(backoff, _retry_after(e) or 0.0)
+                if attempt == len(self.members):
+                    raise
+                continue
+            with self._lock:
+                member.in_flight -= 1
+                member.consecutive_throttles = 0
+            return result
+
+    def generate(self, **kwargs) -> str:
+        return self._call("generate", **kwargs)
+
+    def chat(self, **kwargs) -> str:
+        return self._call("chat", **kwargs)
+
+    def count_tokens(self, **kwargs) -> int:
+        return self._call("count_tokens", **kwargs)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-key load and health (keys are shown by their last 4 characters)"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    'key': f"...{m.provider.api_key[-4:]}",
+                    'base_url': getattr(m.provider, 'base_url', None),
+                    'in_flight': m.in_flight,
+                    'requests': m.requests,
+                    'throttled': m.throttled,
+                    'errors': m.errors,
+                    'healthy': m.cooling_until <= now,
+                    'cooling_for': max(m.cooling_until - now, 0.0)
+                }
+                for m in self.members
+            ]
@@ -1,13 +1,15 @@
 import anthropic
+import json
 import os
-from typing import Optional
+from typing import Callable, Optional, Dict, Any, List
 
 class ClaudeProvider:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY not found")
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.base_url = base_url
+        self.client = anthropic.Anthropic(api_key=self.api_key, base_url=base_url)
     
     def generate(
         self,
@@ -15,10 +17,34 @@ class ClaudeProvider:
         model: str = "claude-sonnet-4-20250514",
         system_prompt: Optional[str] = None,
         temperature: float = 1.0,
-        max_tokens: int = 1024
+        max_tokens: int = 1024,
+        json_schema: Optional[Dict[str, Any]] = None,
+        on_first_token: Optional[Callable[[], None]] = None
     ) -> str:
-        messages = [{"role": "user", "content": prompt}]
-        
+        return self.chat(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_schema=json_schema,
+            on_first_token=on_first_token
+        )
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "claude-sonnet-4-20250514",
+        system_prompt: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 1024,
+        json_schema: Optional[Dict[str, Any]] = None,
+        on_first_token: Optional[Callable[[], None]] = None
+    ) -> str:
+        """
+        Generate the next assistant reply to a list of {"role", "content"} messages.
+        With `on_first_token`, the reply is streamed and the callback fires when its first token arrives.
+        """
         kwargs = {
             "model": model,
             "max_tokens": max_tokens,
@@ -28,6 +54,55 @@ class ClaudeProvider:
         
         if system_prompt:
             kwargs["system"] = system_prompt
+
+        if json_schema is not None:
+            return self._generate_structured(kwargs, json_schema, on_first_token)
         
-        response = self.client.messages.create(**kwargs)
-        return response.content[0].text
\ No newline at end of file
+        response = self._create(kwargs, on_first_token)
+        return response.content[0].text
+
+    def _create(self, kwargs: Dict[str, Any], on_first_token: Optional[Callable[[], None]]):
+        if on_first_token is None:
+            return self.client.messages.create(**kwargs)
+        with self.client.messages.stream(**kwargs) as stream:
+            for event in stream:
+                if event.type == "content_block_delta":
+                    on_first_token()
+                    break
+            return stream.get_final_message()
+
+    def count_tokens(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "claude-sonnet-4-20250514",
+        system_prompt: Optional[str] = None
+    ) -> int:
+        """Input tokens for a request, from the token counting endpoint (no generation is billed)"""
+        kwargs = {"model": model, "messages": messages}
+        if system_prompt:
+            kwargs["system"] = system_prompt
+        return self.client.messages.count_tokens(**kwargs).input_tokens
+
+    def _generate_structured(
+        self,
+        kwargs: Dict[str, Any],
+        json_schema: Dict[str, Any],
+        on_first_token: Optional[Callable[[], None]] = None
+    ) -> str:
+        """Force a single tool call whose input follows the schema and return it as JSON text"""
+        # Tool inputs must be objects, so other schemas are wrapped in a "value" property
+        wrapped = json_schema.get("type") != "object"
+        input_schema = (
+            {"type": "object", "properties": {"value": json_schema}, "required": ["value"]}
+            if wrapped else json_schema
+        )
+        kwargs["tools"] = [{
+            "name": "respond",
+            "description": "Return the response as structured data.",
+            "input_schema": input_schema
+        }]
+        kwargs["tool_choice"] = {"type": "tool", "name": "respond"}
+
+        response = self._create(kwargs, on_first_token)
+        tool_input = next(block.input for block in response.content if block.type == "tool_use")
+        return json.dumps(tool_input["value"] if wrapped else tool_input)
@@ -1,7 +1,5 @@
 import os
-from typing import Optional
-from .claude import ClaudeProvider
-from .openai import OpenAIProvider
+from typing import Callable, Optional, Dict, Any, List
 
 class GooseProvider:
     """
@@ -16,12 +14,11 @@ class GooseProvider:
     def __init__(self, backend: Optional[str] = None):
         self.backend = backend or os.getenv("GOOSE_BACKEND", "claude")
         
-        if self.backend == "claude":
-            self.provider = ClaudeProvider()
-        elif self.backend == "openai":
-            self.provider = OpenAIProvider()
-        else:
+        if self.backend not in ("claude", "openai"):
             raise ValueError(f"Unknown Goose backend: {self.backend}")
+        # Imported here to avoid a cycle; gives Goose the same key pooling as direct providers
+        from src.api.client import create_provider
+        self.provider = create_provider(self.backend)
         
         print(f"🪿 Goose using backend: {self.backend}")
     
@@ -31,7 +28,9 @@ class GooseProvider:
         model: str = "claude-sonnet-4-20250514",
         system_prompt: Optional[str] = None,
         temperature: float = 1.0,
-        max_tokens: int = 1024
+        max_tokens: int = 1024,
+        json_schema: Optional[Dict[str, Any]] = None,
+        on_first_token: Optional[Callable[[], None]] = None
     ) -> str:
         """
         Generate using Goose's underlying provider.
@@ -51,5 +50,40 @@ class GooseProvider:
             model=model,
             system_prompt=enhanced_system,
             temperature=temperature,
-            max_tokens=max_tokens
-        )
\ No newline at end of file
+            max_tokens=max_tokens,
+            json_schema=json_schema,
+            on_first_token=on_first_token
+        )
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "claude-sonnet-4-20250514",
+        system_prompt: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 1024,
+        json_schema: Optional[Dict[str, Any]] = None,
+        on_first_token: Optional[Callable[[], None]] = None
+    ) -> str:
+        """Multi-turn variant of generate(), routed to the underlying provider the same way"""
+        return self.provider.chat(
+            messages=messages,
+            model=model,
+            system_prompt=system_prompt or "You are Goose, a helpful AI assistant.",
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_schema=json_schema,
+            on_first_token=on_first_token
+        )
+
+    def count_tokens(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "claude-sonnet-4-20250514",
+        system_prompt: Optional[str] = None
+    ) -> int:
+        return self.provider.count_tokens(
+            messages=messages,
+            model=model,
+            system_prompt=system_prompt or "You are Goose, a helpful AI assistant."
+        )
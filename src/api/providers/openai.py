@@ -1,13 +1,14 @@
 import openai
 import os
-from typing import Optional
+from typing import Callable, Optional, Dict, Any, List
 
 class OpenAIProvider:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found")
-        openai.api_key = self.api_key
+        self.base_url = base_url
+        self.client = openai.OpenAI(api_key=self.api_key, base_url=base_url)
 
     
     def generate(
@@ -16,20 +17,80 @@ class OpenAIProvider:
         model: str = "gpt-4",
         system_prompt: Optional[str] = None,
         temperature: float = 1.0,
-        max_tokens: int = 1024
+        max_tokens: int = 1024,
+        json_schema: Optional[Dict[str, Any]] = None,
+        on_first_token: Optional[Callable[[], None]] = None
     ) -> str:
-        messages = []
-        
+        return self.chat(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_schema=json_schema,
+            on_first_token=on_first_token
+        )
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4",
+        system_prompt: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 1024,
+        json_schema: Optional[Dict[str, Any]] = None,
+        on_first_token: Optional[Callable[[], None]] = None
+    ) -> str:
+        """
+        Generate the next assistant reply to a list of {"role", "content"} messages.
+        With `on_first_token`, the reply is streamed and the callback fires when its first token arrives.
+        """
         if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        
-        messages.append({"role": "user", "content": prompt})
+            messages = [{"role": "system", "content": system_prompt}] + messages
+
+        kwargs = {}
+        if json_schema is not None:
+            kwargs["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": json_schema}
+            }
         
-        response = openai.ChatCompletion.create(
+        response = self.client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            stream=on_first_token is not None,
+            **kwargs
         )
-        
-        return response.choices[0].message.content
\ No newline at end of file
+        if on_first_token is None:
+            return response.choices[0].message.content
+
+        chunks = []
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                if not chunks:
+                    on_first_token()
+                chunks.append(delta)
+        return "".join(chunks)
+
+    def count_tokens(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4",
+        system_prompt: Optional[str] = None
+    ) -> int:
+        """Input tokens for a request, counted locally with tiktoken"""
+        try:
+            import tiktoken
+        except ImportError:
+            raise ImportError("Token counting for OpenAI models requires tiktoken: pip install tiktoken")
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        if system_prompt:
+            messages = [{"role": "system", "content": system_prompt}] + messages
+        # Each message carries a few tokens of role/formatting overhead, and the reply is primed with 3
+        return sum(4 + len(encoding.encode(m["content"])) for m in messages) + 3
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from src.core.models import TestCase
+from src.storage.locking import file_lock, atomic_write_json
+from src.utils.helpers import MODEL_PRICING, estimate_tokens, estimate_cost
+
+# Models missing from MODEL_PRICING are charged at the highest listed prices, so a spend cap still holds for them
+UNKNOWN_MODEL_PRICING = (
+    max(input_price for input_price, _ in MODEL_PRICING.values()),
+    max(output_price for _, output_price in MODEL_PRICING.values())
+)
+
+def charge(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Cost of a call against a spend cap (unknown models at UNKNOWN_MODEL_PRICING)"""
+    return estimate_cost(model, input_tokens, output_tokens, UNKNOWN_MODEL_PRICING)
+
+class BudgetExceeded(Exception):
+    """Raised instead of dispatching a call that could push a run over its spend cap"""
+
+class RunBudget:
+    """
+    Per-run spend cap (USD).
+
+    Each call reserves its worst-case cost (counted input plus max_tokens of output, see
+    charge) before it is dispatched and settles to its estimated actual cost afterwards, so concurrent calls
+    can't overshoot the cap together. A call that only fits once in-flight calls settle
+    waits for them; once a call can't fit at all, no further calls are dispatched.
+    cancel() stops dispatching the same way, so a budget also serves as a run's stop switch.
+    """
+
+    def __init__(self, limit: float = float("inf")):
+        self.limit = limit
+        # Without a cap calls are only tallied, so they're priced from estimated rather than counted tokens
+        self.capped = limit != float("inf")
+        self.spent = 0.0
+        self.reserved = 0.0
+        self.stopped = False
+        self.cancelled = False
+        self._settled = threading.Condition()
+
+    def cancel(self):
+        """Stop dispatching calls regardless of spend (calls in flight still finish)"""
+        with self._settled:
+            self.stopped = self.cancelled = True
+            self._settled.notify_all()
+
+    def reserve(self, cost: float):
+        with self._settled:
+            while not self.stopped and self.spent + self.reserved + cost > self.limit:
+                if self.spent + cost > self.limit:
+                    self.stopped = True
+                else:
+                    self._settled.wait()
+            if self.cancelled:
+                raise BudgetExceeded("Run cancelled")
+            if self.stopped:
+                raise BudgetExceeded(f"Run budget of ${self.limit:.2f} reached (${self.spent:.4f} spent)")
+            self.reserved += cost
+
+    def settle(self, reserved: float, actual: float = 0.0):
+        """Release a reservation, charging `actual` (0.0 for calls that failed)"""
+        with self._settled:
+            self.reserved -= reserved
+            self.spent += actual
+            self._settled.notify_all()
+
+class TokenCounter:
+    """
+    Counts input tokens with each provider's own counter (Anthropic's count endpoint,
+    tiktoken for OpenAI), falling back to helpers.estimate_tokens when that isn't available.
+    Exact counts are cached on disk by a hash of the request. Safe to share between threads.
+    """
+
+    def __init__(self, get_provider: Callable[[str], Any], cache_file: str = "data/token_cache.json"):
+        self.get_provider = get_provider
+        self.cache_file = Path(cache_file)
+        self._cache: Dict[str, int] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if self.cache_file.exists():
+            with open(self.cache_file, 'r') as f:
+                self._cache = json.load(f)
+
+    def count(self, provider_name: str, model: str, messages: List[Dict[str, str]], system_prompt: Optional[str] = None) -> int:
+        key = hashlib.sha256(
+            json.dumps([provider_name, model, system_prompt, messages]).encode("utf-8")
+        ).hexdigest()
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        try:
+            tokens = self.get_provider(provider_name).count_tokens(
+                messages=messages, model=model, system_prompt=system_prompt
+            )
+        except Exception:
+            return estimate_tokens((system_prompt or "") + "".join(m["content"] for m in messages))
+        with self._lock:
+            self._cache[key] = tokens
+            self._dirty = True
+        return tokens
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # Merge with counts other processes saved since we loaded
+            with file_lock(self.cache_file):
+                if self.cache_file.exists():
+                    with open(self.cache_file, 'r') as f:
+                        self._cache = {**json.load(f), **self._cache}
+                atomic_write_json(self.cache_file, self._cache)
+            self._dirty = False
+
+def preflight(
+    test_cases: List[TestCase],
+    counter: TokenCounter,
+    history: Optional[Dict[str, Dict[str, float]]] = None
+) -> Dict[str, Any]:
+    """
+    Estimate a run before dispatching it.
+
+    Input tokens are counted per call (each turn of a conversation resends the earlier
+    messages, and each sample of a single-prompt test is a call of its own). Output is estimated from the test's past response lengths in `history`
+    (see scheduler.result_history), or max_tokens when it has none; max_cost assumes every
+    call uses all of max_tokens. Duration is the sum of past mean latencies, with tests
+    that have no history counted at the average of those that do.
+    """
+    history = history or {}
+    rows = []
+    for test_case in test_cases:
+        stats = history.get(test_case.id, {})
+        user_messages = [test_case.prompt] + [turn.content for turn in test_case.turns]
+        # ~4 characters per token, as in helpers.estimate_tokens
+        expected_output = min(max(1, int(stats['mean_response_length']) // 4), test_case.max_tokens) \
+            if stats.get('mean_response_length') else test_case.max_tokens
+
+        input_tokens = 0
+        for turn in range(len(user_messages)):
+            messages = [{"role": "user", "content": "\n\n".join(user_messages[:turn + 1])}]
+            input_tokens += counter.count(test_case.provider, test_case.model, messages, test_case.system_prompt)
+        calls = len(user_messages)
+        # Earlier replies are resent as history on every later turn
+        resent_calls = calls * (calls - 1) // 2
+        # A single-prompt test repeats its one call per sample
+        repeats = 1 if test_case.turns else max(test_case.samples, 1)
+        calls *= repeats
+        input_tokens *= repeats
+
+        rows.append({
+            'test_id': test_case.id,
+            'test_name': test_case.name,
+            'model': test_case.model,
+            'calls': calls,
+            'input_tokens': input_tokens,
+            'max_output_tokens': calls * test_case.max_tokens,
+            'expected_cost': estimate_cost(
+                test_case.model, input_tokens + resent_calls * expected_output, calls * expected_output
+            ),
+            'max_cost': estimate_cost(
+                test_case.model, input_tokens + resent_calls * test_case.max_tokens, calls * test_case.max_tokens
+            ),
+            # execution_time is the mean over a result's samples
+            'expected_latency': stats['mean_latency'] * repeats if 'mean_latency' in stats else None
+        })
+    counter.save()
+
+    known = [row['expected_latency'] for row in rows if row['expected_latency'] is not None]
+    average = sum(known) / len(known) if known else None
+    return {
+        'tests': rows,
+        'input_tokens': sum(row['input_tokens'] for row in rows),
+        'expected_cost': sum(row['expected_cost'] for row in rows),
+        'max_cost': sum(row['max_cost'] for row in rows),
+        'expected_duration': sum(known) + average * (len(rows) - len(known)) if known else None,
+        'without_history': len(rows) - len(known)
+    }
@@ -0,0 +1,95 @@
+import difflib
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+def compare_runs(
+    results: Iterable[dict],
+    base_run_id: str,
+    head_run_id: str,
+    latency_threshold: float = 0.5,
+    min_latency_delta: float = 0.5,
+    load_text: Optional[Callable[[dict, str], str]] = None
+) -> Dict[str, Any]:
+    """
+    Compare two runs matched by test_id, in a single pass over `results`.
+
+    `results` may be any stream of stored results (e.g. StorageManager.iter_results
+    filtered to both runs); only the two runs' latest result per test is kept.
+    A latency regression is a slowdown of more than `latency_threshold` (fraction)
+    and more than `min_latency_delta` seconds. Text diffs are only computed for
+    regressed tests whose responses actually changed; pass `load_text`
+    (e.g. StorageManager.load_text) to fetch responses kept in the blob store.
+    """
+    runs: Dict[str, Dict[str, dict]] = {base_run_id: {}, head_run_id: {}}
+    for result in results:
+        run = runs.get(result.get('run_id'))
+        if run is not None:
+            run[result['test_id']] = result
+
+    base, head = runs[base_run_id], runs[head_run_id]
+    regressions: List[Dict[str, Any]] = []
+    fixed = 0
+
+    for test_id, head_result in head.items():
+        base_result = base.get(test_id)
+        if base_result is None:
+            continue
+
+        base_passed, head_passed = _passed(base_result), _passed(head_result)
+        latency_delta = head_result['execution_time'] - base_result['execution_time']
+
+        kinds = []
+        if base_passed is True and head_passed is False:
+            kinds.append("newly_failing")
+        elif base_passed is False and head_passed is True:
+            fixed += 1
+        if (latency_delta > min_latency_delta
+                and latency_delta > base_result['execution_time'] * latency_threshold):
+            kinds.append("slower")
+
+        if kinds:
+            regressions.append({
+                'test_id': test_id,
+                'test_name': head_result['test_name'],
+                'kinds': kinds,
+                'base_passed': base_passed,
+                'head_passed': head_passed,
+                'base_time': base_result['execution_time'],
+                'head_time': head_result['execution_time'],
+                'latency_delta': latency_delta,
+                'error': head_result.get('error'),
+                'diff': _response_diff(base_result, head_result, load_text)
+            })
+
+    regressions.sort(key=lambda r: ("newly_failing" not in r['kinds'], -r['latency_delta']))
+
+    return {
+        'base_run_id': base_run_id,
+        'head_run_id': head_run_id,
+        'compared': sum(1 for test_id in head if test_id in base),
+        'added': sum(1 for test_id in head if test_id not in base),
+        'removed': sum(1 for test_id in base if test_id not in head),
+        'fixed': fixed,
+        'newly_failing': sum(1 for r in regressions if "newly_failing" in r['kinds']),
+        'slower': sum(1 for r in regressions if "slower" in r['kinds']),
+        'regressions': regressions
+    }
+
+def _passed(result: dict):
+    # Errored runs count as failures
+    return False if result.get('error') else result.get('passed')
+
+def _response_diff(base_result: dict, head_result: dict, load_text: Optional[Callable[[dict, str], str]]) -> str:
+    if base_result.get('response_hash') and base_result.get('response_hash') == head_result.get('response_hash'):
+        return ""
+    if load_text is None:
+        load_text = lambda result, field: result.get(field, '')
+    base_text, head_text = load_text(base_result, 'response'), load_text(head_result, 'response')
+    if base_text == head_text:
+        return ""
+    return "\n".join(difflib.unified_diff(
+        base_text.splitlines(),
+        head_text.splitlines(),
+        fromfile=f"run {base_result['run_id']}",
+        tofile=f"run {head_result['run_id']}",
+        lineterm=""
+    ))
@@ -0,0 +1,86 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from src.utils.helpers import sanitize_filename
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+class EmbeddingIndex:
+    """
+    Local CPU embedding index with an on-disk cache.
+
+    Reference texts are cached as .npy files keyed by the SHA-256 of the
+    text, so each reference answer is embedded only once across runs.
+    Set EMBEDDING_MODEL to use a different sentence-transformers model.
+    """
+
+    def __init__(self, cache_dir: str = "data/embeddings", model_name: Optional[str] = None):
+        self.model_name = model_name or os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+        self.cache_dir = Path(cache_dir) / sanitize_filename(self.model_name)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._model = None
+        self._vectors: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _get_model(self):
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError(
+                    "semantic_similarity requires sentence-transformers "
+                    "(pip install sentence-transformers)"
+                )
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def embed(self, texts: List[str], persist: bool = True) -> np.ndarray:
+        """
+        Return unit-length embeddings, one row per text.
+        Only texts missing from the cache are sent to the model, in a single batch.
+        With persist=False new vectors are not cached (used for responses).
+        """
+        hashes = [self.text_hash(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+
+        for h, text in zip(hashes, texts):
+            if h in found or h in missing:
+                continue
+            if h in self._vectors:
+                found[h] = self._vectors[h]
+                continue
+            path = self.cache_dir / f"{h}.npy"
+            if path.exists():
+                found[h] = self._vectors[h] = np.load(path)
+            else:
+                missing[h] = text
+
+        if missing:
+            vectors = self._get_model().encode(
+                list(missing.values()), batch_size=32, convert_to_numpy=True
+            ).astype(np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+            for h, vector in zip(missing, vectors):
+                found[h] = vector
+                if persist:
+                    self._vectors[h] = vector
+                    np.save(self.cache_dir / f"{h}.npy", vector)
+
+        if not hashes:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[h] for h in hashes])
+
+    def similarities(self, responses: List[str], references: List[str]) -> np.ndarray:
+        """Cosine similarity of responses[i] against references[i], computed in one vectorized pass"""
+        if not responses:
+            return np.zeros(0, dtype=np.float32)
+        response_vectors = self.embed(responses, persist=False)
+        reference_vectors = self.embed(references)
+        return np.einsum("ij,ij->i", response_vectors, reference_vectors)
@@ -1,30 +1,235 @@
+import json
+import os
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from src.core.models import Expectation, EvaluationType
+from src.core.latency import percentile
+from src.utils.helpers import regex_search
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+JSON_TYPES = (EvaluationType.JSON_VALID, EvaluationType.JSON_SCHEMA)
+# Timing checks: the metric each reads from a result's samples
+LATENCY_TYPES = {
+    EvaluationType.LATENCY_MAX: "latency",
+    EvaluationType.TTFT_MAX: "ttft",
+    EvaluationType.TOKENS_PER_SEC_MIN: "tokens_per_sec",
+}
+
+_schema_validators: Dict[str, Any] = {}
 
 class Evaluator:
+    # Time budget (seconds) for each user-supplied regex
+    regex_timeout = float(os.getenv("REGEX_TIMEOUT", "1.0"))
+    _embedding_index = None
+    _judge = None
+
+    @classmethod
+    def get_embedding_index(cls):
+        if cls._embedding_index is None:
+            from src.core.embeddings import EmbeddingIndex
+            cls._embedding_index = EmbeddingIndex()
+        return cls._embedding_index
+
+    @classmethod
+    def get_judge(cls):
+        if cls._judge is None:
+            from src.core.judge import Judge
+            cls._judge = Judge()
+        return cls._judge
+
     @staticmethod
-    def evaluate(response: str, expectations: List[Expectation]) -> tuple[bool, List[Dict[str, Any]]]:
+    def evaluate(response: str, expectations: List[Expectation], timings: Optional[List[Dict[str, Any]]] = None) -> tuple[bool, List[Dict[str, Any]]]:
         """
         Evaluate a response against expectations.
+        `timings` are the response's generation timings, for latency checks.
         Returns (overall_passed, detailed_results)
         """
-        if not expectations:
-            return None, []  # No expectations = manual review needed
-        
-        results = []
-        all_passed = True
-        
-        for exp in expectations:
-            result = Evaluator._evaluate_single(response, exp)
-            results.append(result)
-            if not result['passed']:
-                all_passed = False
-        
-        return all_passed, results
+        return Evaluator.evaluate_batch([(response, expectations)], [timings] if timings else None)[0]
     
     @staticmethod
-    def _evaluate_single(response: str, expectation: Expectation) -> Dict[str, Any]:
+    def evaluate_batch(
+        items: List[Tuple[str, List[Expectation]]],
+        timings: Optional[List[Optional[List[Dict[str, Any]]]]] = None
+    ) -> List[tuple[bool, List[Dict[str, Any]]]]:
+        """
+        Evaluate several (response, expectations) pairs at once.
+        Semantic similarity checks across all items are embedded and scored together,
+        and judge checks are graded concurrently.
+        JSON responses are parsed once per item however many JSON checks it has.
+        `timings` holds each item's generation timings ({'latency', 'ttft', 'tokens_per_sec'}
+        per sample) for latency checks.
+        """
+        precomputed = Evaluator._semantic_scores(items)
+        precomputed.update(Evaluator._judge_verdicts(items))
+        precomputed.update(Evaluator._parsed_json(items))
+        for i, (_, expectations) in enumerate(items):
+            for j, exp in enumerate(expectations):
+                if exp.type in LATENCY_TYPES:
+                    precomputed[(i, j)] = (timings[i] if timings else None) or []
+        outputs = []
+
+        for i, (response, expectations) in enumerate(items):
+            if not expectations:
+                outputs.append((None, []))  # No expectations = manual review needed
+                continue
+
+            results = []
+            all_passed = True
+
+            for j, exp in enumerate(expectations):
+                try:
+                    result = Evaluator._evaluate_single(response, exp, precomputed.get((i, j)))
+                except Exception as e:
+                    # A malformed expectation fails its own check, not the whole batch
+                    result = {
+                        'type': exp.type,
+                        'description': exp.description or f"{exp.type}: {exp.value}",
+                        'passed': False,
+                        'status': "error",
+                        'error': f"{type(e).__name__}: {e}",
+                        'details': f"Could not evaluate: {e}"
+                    }
+                if result.get('error'):
+                    # Checks that ran but couldn't reach a verdict (timeouts, invalid patterns, ...)
+                    result['status'] = "error"
+                results.append(result)
+                if not result['passed']:
+                    all_passed = False
+
+            outputs.append((all_passed, results))
+
+        return outputs
+
+    @staticmethod
+    def dict_value(value: Any) -> Any:
+        """Dict values saved from the UI arrive as JSON text"""
+        if isinstance(value, str) and value.strip().startswith("{"):
+            return json.loads(value)
+        return value
+
+    @staticmethod
+    def semantic_params(value: Any) -> Tuple[str, float]:
+        """Semantic expectations take a reference string or {"reference": ..., "threshold": ...}"""
+        value = Evaluator.dict_value(value)
+        if isinstance(value, dict):
+            return str(value['reference']), float(value.get('threshold', DEFAULT_SIMILARITY_THRESHOLD))
+        return str(value), DEFAULT_SIMILARITY_THRESHOLD
+
+    @staticmethod
+    def _semantic_scores(items: List[Tuple[str, List[Expectation]]]) -> Dict[Tuple[int, int], Any]:
+        keys, responses, references = [], [], []
+        for i, (response, expectations) in enumerate(items):
+            for j, exp in enumerate(expectations):
+                if exp.type == EvaluationType.SEMANTIC_SIMILARITY:
+                    try:
+                        reference = Evaluator.semantic_params(exp.value)[0]
+                    except Exception:
+                        continue  # Reported by _evaluate_single
+                    keys.append((i, j))
+                    responses.append(response)
+                    references.append(reference)
+
+        if not keys:
+            return {}
+
+        try:
+            similarities = Evaluator.get_embedding_index().similarities(responses, references)
+        except Exception as e:
+            return {key: e for key in keys}
+        return {key: float(score) for key, score in zip(keys, similarities)}
+
+    @staticmethod
+    def judge_rubric(value: Any) -> str:
+        """Judge expectations take a rubric string or {"rubric": ...}"""
+        value = Evaluator.dict_value(value)
+        if isinstance(value, dict):
+            return str(value['rubric'])
+        return str(value)
+
+    @staticmethod
+    def _judge_verdicts(items: List[Tuple[str, List[Expectation]]]) -> Dict[Tuple[int, int], Any]:
+        keys, pairs = [], []
+        for i, (response, expectations) in enumerate(items):
+            for j, exp in enumerate(expectations):
+                if exp.type == EvaluationType.JUDGE:
+                    try:
+                        rubric = Evaluator.judge_rubric(exp.value)
+                    except Exception:
+                        continue  # Reported by _evaluate_single
+                    keys.append((i, j))
+                    pairs.append((rubric, response))
+
+        if not keys:
+            return {}
+
+        try:
+            verdicts = Evaluator.get_judge().grade_batch(pairs)
+        except Exception as e:
+            return {key: e for key in keys}
+        return dict(zip(keys, verdicts))
+
+    @staticmethod
+    def parse_json(response: str) -> Tuple[Any, Optional[str]]:
+        """Parse a JSON response, tolerating a surrounding markdown code fence. Returns (data, error)"""
+        text = response.strip()
+        fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+        if fenced:
+            text = fenced.group(1)
+        try:
+            return json.loads(text), None
+        except json.JSONDecodeError as e:
+            return None, f"Invalid JSON: {e}"
+
+    @staticmethod
+    def _parsed_json(items: List[Tuple[str, List[Expectation]]]) -> Dict[Tuple[int, int], Any]:
+        parsed = {}
+        for i, (response, expectations) in enumerate(items):
+            keys = [(i, j) for j, exp in enumerate(expectations) if exp.type in JSON_TYPES]
+            if keys:
+                data = Evaluator.parse_json(response)
+                parsed.update({key: data for key in keys})
+        return parsed
+
+    @staticmethod
+    def schema_value(value: Any) -> Dict[str, Any]:
+        """json_schema expectations take a schema dict or its JSON text"""
+        return json.loads(value) if isinstance(value, str) else value
+
+    @staticmethod
+    def get_schema_validator(schema: Dict[str, Any]):
+        """Compile a JSON schema once and reuse the validator for every response checked against it"""
+        key = json.dumps(schema, sort_keys=True)
+        if key not in _schema_validators:
+            from jsonschema.validators import validator_for
+            validator_class = validator_for(schema)
+            validator_class.check_schema(schema)
+            _schema_validators[key] = validator_class(schema)
+        return _schema_validators[key]
+
+    @staticmethod
+    def latency_params(expectation_type: EvaluationType, value: Any) -> Tuple[float, float]:
+        """
+        Latency expectations take a threshold or {"threshold": ..., "percentile": ...} (or its JSON text).
+        Without a percentile every sample must meet the threshold.
+        """
+        if isinstance(value, str):
+            value = json.loads(value)
+        default = 0.0 if expectation_type == EvaluationType.TOKENS_PER_SEC_MIN else 100.0
+        if isinstance(value, dict):
+            return float(value['threshold']), float(value.get('percentile', default))
+        return float(value), default
+
+    @staticmethod
+    def _field_errors(validator, data: Any) -> List[Dict[str, str]]:
+        """Schema violations as {'path': '$.items[0].name', 'message': ...}"""
+        errors = []
+        for error in validator.iter_errors(data):
+            path = "$" + "".join(f"[{p}]" if isinstance(p, int) else f".{p}" for p in error.absolute_path)
+            errors.append({'path': path, 'message': error.message})
+        return sorted(errors, key=lambda e: e['path'])
+
+    @staticmethod
+    def _evaluate_single(response: str, expectation: Expectation, precomputed: Optional[Any] = None) -> Dict[str, Any]:
         result = {
             'type': expectation.type,
             'description': expectation.description or f"{expectation.type}: {expectation.value}",
@@ -41,20 +246,101 @@ class Evaluator:
             result['details'] = f"Should not contain: '{expectation.value}'"
         
         elif expectation.type == EvaluationType.REGEX:
-            match = re.search(expectation.value, response)
-            result['passed'] = match is not None
-            result['details'] = f"Pattern: {expectation.value}"
+            try:
+                match = regex_search(expectation.value, response, timeout=Evaluator.regex_timeout)
+                result['passed'] = match is not None
+                result['details'] = f"Pattern: {expectation.value}"
+            except TimeoutError:
+                result['error'] = f"Regex timed out after {Evaluator.regex_timeout}s"
+                result['details'] = f"Pattern: {expectation.value} (timed out after {Evaluator.regex_timeout}s)"
+            except Exception as e:
+                result['error'] = f"Invalid regex: {e}"
+                result['details'] = f"Pattern: {expectation.value} (invalid: {e})"
         
         elif expectation.type == EvaluationType.LENGTH_MIN:
-            result['passed'] = len(response) >= expectation.value
+            result['passed'] = len(response) >= int(expectation.value)
             result['details'] = f"Min length: {expectation.value}, Actual: {len(response)}"
         
         elif expectation.type == EvaluationType.LENGTH_MAX:
-            result['passed'] = len(response) <= expectation.value
+            result['passed'] = len(response) <= int(expectation.value)
             result['details'] = f"Max length: {expectation.value}, Actual: {len(response)}"
         
+        elif expectation.type == EvaluationType.SEMANTIC_SIMILARITY:
+            reference, threshold = Evaluator.semantic_params(expectation.value)
+            score = precomputed
+            if score is None:
+                score = Evaluator._semantic_scores([(response, [expectation])]).get((0, 0))
+            if isinstance(score, Exception):
+                result['error'] = str(score)
+                result['details'] = f"Semantic similarity unavailable: {score}"
+            else:
+                result['passed'] = score >= threshold
+                result['score'] = round(score, 4)
+                result['details'] = f"Similarity: {score:.3f}, Threshold: {threshold}"
+
+        elif expectation.type == EvaluationType.JUDGE:
+            verdict = precomputed
+            if verdict is None:
+                verdict = Evaluator._judge_verdicts([(response, [expectation])]).get((0, 0))
+            if isinstance(verdict, Exception):
+                verdict = {'error': str(verdict), 'latency': 0.0, 'cost': 0.0, 'cached': False}
+            if 'error' in verdict:
+                result['error'] = verdict['error']
+                result['details'] = f"Judge unavailable: {verdict['error']}"
+            else:
+                result['passed'] = verdict['passed']
+                result['details'] = verdict['reason']
+            result['judge_latency'] = verdict['latency']
+            result['judge_cost'] = verdict['cost']
+            result['judge_cached'] = verdict['cached']
+
+        elif expectation.type in JSON_TYPES:
+            data, parse_error = precomputed or Evaluator.parse_json(response)
+            if parse_error:
+                result['details'] = parse_error
+            elif expectation.type == EvaluationType.JSON_VALID:
+                result['passed'] = True
+                result['details'] = "Valid JSON"
+            else:
+                try:
+                    validator = Evaluator.get_schema_validator(Evaluator.schema_value(expectation.value))
+                except Exception as e:
+                    message = getattr(e, 'message', str(e))
+                    result['error'] = message
+                    result['details'] = f"Invalid schema: {message}"
+                else:
+                    field_errors = Evaluator._field_errors(validator, data)
+                    result['passed'] = not field_errors
+                    result['field_errors'] = field_errors
+                    result['details'] = (
+                        "; ".join(f"{e['path']}: {e['message']}" for e in field_errors)
+                        if field_errors else "Matches schema"
+                    )
+
+        elif expectation.type in LATENCY_TYPES:
+            metric = LATENCY_TYPES[expectation.type]
+            threshold, p = Evaluator.latency_params(expectation.type, expectation.value)
+            values = [timing[metric] for timing in precomputed or [] if timing.get(metric) is not None]
+            unit = " tokens/s" if metric == "tokens_per_sec" else "s"
+            limit = f"{'Min' if expectation.type == EvaluationType.TOKENS_PER_SEC_MIN else 'Max'}: {threshold}{unit}"
+            if not values:
+                result['error'] = f"No {metric} recorded for this response"
+                result['details'] = f"{limit}, Actual: not recorded"
+            else:
+                observed = percentile(values, p)
+                if expectation.type == EvaluationType.TOKENS_PER_SEC_MIN:
+                    result['passed'] = observed >= threshold
+                else:
+                    result['passed'] = observed <= threshold
+                result['observed'] = round(observed, 4)
+                if len(values) == 1:
+                    label = "Actual"
+                else:
+                    label = f"{'Worst' if p in (0.0, 100.0) else f'p{p:g}'} of {len(values)} samples"
+                result['details'] = f"{limit}, {label}: {observed:.2f}{unit}"
+
         elif expectation.type == EvaluationType.MANUAL:
             result['passed'] = None  # Requires manual review
             result['details'] = "Manual review required"
         
-        return result
\ No newline at end of file
+        return result
@@ -0,0 +1,276 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from src.core.budget import RunBudget, preflight
+from src.core.models import TestCase
+from src.core.runner import TestRunner
+from src.core.scheduler import prioritize, result_history
+from src.core.selection import select_tests
+from src.storage.locking import atomic_write_json
+from src.storage.manager import StorageManager
+
+ACTIVE_STATES = ("queued", "running")
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows; rely on the heartbeat there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class JobManager:
+    """
+    Runs test suites in background threads, independently of the page that started them.
+
+    Each job is one run (job ID = run_id). Results are saved as they complete, and the
+    job's progress is written to data/jobs/<job_id>.json, where any session can poll it.
+    Up to `max_concurrent_jobs` runs execute at once; later ones wait in the queue.
+    A run is executed `chunk_size` tests at a time (each chunk batch-evaluated, with up to
+    `max_workers` calls in flight), so progress advances chunk by chunk. Cancelling stops
+    new calls from being dispatched; calls already in flight finish first.
+
+    Each job file records its owner (host, pid and manager instance) and a heartbeat the
+    owner renews every `heartbeat_interval` seconds. A job still marked active whose
+    owner's process is gone, or whose heartbeat is older than `stale_after` seconds, is
+    marked interrupted by whichever manager notices. Any manager can cancel an active
+    job: the owner picks up the request (a data/jobs/<job_id>.cancel file) on its next heartbeat.
+    """
+
+    def __init__(
+        self,
+        storage: StorageManager,
+        max_concurrent_jobs: int = 2,
+        chunk_size: int = 20,
+        heartbeat_interval: float = 5.0,
+        stale_after: float = 60.0
+    ):
+        self.storage = storage
+        self.jobs_dir = storage.data_dir / "jobs"
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.owner = {'host': socket.gethostname(), 'pid': os.getpid(), 'instance': uuid.uuid4().hex}
+        self.runner = TestRunner(storage.data_dir / "token_cache.json")
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="run-job")
+        self._active: Dict[str, Tuple[Dict[str, Any], RunBudget]] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._mark_interrupted()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat, daemon=True, name="run-job-heartbeat")
+        self._heartbeat_thread.start()
+
+    def shutdown(self, wait: bool = True):
+        """Stop the heartbeat and, with `wait`, let queued and running jobs finish"""
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._lock:
+                active = list(self._active.values())
+            for job, budget in active:
+                if self._cancel_file(job['job_id']).exists():
+                    budget.cancel()
+                self._save(job)
+            self._mark_interrupted()
+
+    def _owner_alive(self, job: Dict[str, Any]) -> bool:
+        owner = job.get('owner')
+        if not owner:
+            # Saved before jobs recorded their owner
+            return False
+        if owner['instance'] == self.owner['instance']:
+            # Our own jobs always finish through _run
+            return True
+        if owner['host'] == self.owner['host'] and not _pid_alive(owner['pid']):
+            return False
+        return time.time() - (job.get('heartbeat') or 0) < self.stale_after
+
+    def _mark_interrupted(self):
+        # Active jobs whose owner is gone will never finish
+        for job in self.list_jobs():
+            if job['status'] in ACTIVE_STATES and not self._owner_alive(job):
+                job['status'] = "interrupted"
+                self._save(job)
+                self._cancel_file(job['job_id']).unlink(missing_ok=True)
+
+    def _cancel_file(self, job_id: str):
+        return self.jobs_dir / f"{job_id}.cancel"
+
+    def _save(self, job: Dict[str, Any]):
+        with self._save_lock:
+            job['heartbeat'] = time.time()
+            atomic_write_json(self.jobs_dir / f"{job['job_id']}.json", job, indent=2, default=str)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        path = self.jobs_dir / f"{job_id}.json"
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def list_jobs(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Jobs, newest first"""
+        paths = sorted(self.jobs_dir.glob("*.json"), reverse=True)[:limit]
+        jobs = []
+        for path in paths:
+            with open(path, 'r') as f:
+                jobs.append(json.load(f))
+        return jobs
+
+    def submit(
+        self,
+        test_cases: List[TestCase],
+        only_changed: bool = False,
+        max_age_hours: float = 0,
+        prioritized: bool = True,
+        fail_fast: int = 0,
+        spend_cap: float = 0.0,
+        max_workers: int = 4
+    ) -> str:
+        """Queue a run of the given tests. Returns its job ID (also the run_id of its results)"""
+        job_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        job = {
+            'job_id': job_id,
+            'status': "queued",
+            'submitted': datetime.now().isoformat(),
+            'started': None,
+            'finished': None,
+            'total': len(test_cases),
+            'done': 0,
+            'passed': 0,
+            'failed': 0,
+            'skipped': 0,
+            'reevaluated': 0,
+            'estimate': None,
+            'spent': 0.0,
+            'message': None,
+            'error': None,
+            'owner': self.owner,
+            'heartbeat': None
+        }
+        budget = RunBudget(spend_cap) if spend_cap else RunBudget()
+        with self._lock:
+            self._active[job_id] = (job, budget)
+        self._save(job)
+        self._executor.submit(
+            self._run, job, test_cases, budget,
+            only_changed, max_age_hours, prioritized, fail_fast, max_workers
+        )
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a queued or running job, in this process or another. False if it isn't active"""
+        with self._lock:
+            active = self._active.get(job_id)
+        if active:
+            active[1].cancel()
+            return True
+        job = self.get(job_id)
+        if job is None or job['status'] not in ACTIVE_STATES or not self._owner_alive(job):
+            return False
+        self._cancel_file(job_id).touch()
+        return True
+
+    def _run(
+        self,
+        job: Dict[str, Any],
+        test_cases: List[TestCase],
+        budget: RunBudget,
+        only_changed: bool,
+        max_age_hours: float,
+        prioritized: bool,
+        fail_fast: int,
+        max_workers: int
+    ):
+        job_id = job['job_id']
+        try:
+            if budget.cancelled:
+                job['status'] = "cancelled"
+                return
+            job['status'] = "running"
+            job['started'] = datetime.now().isoformat()
+            self._save(job)
+
+            history = result_history(self.storage.iter_results())
+            if prioritized:
+                test_cases = prioritize(test_cases, history)
+
+            if only_changed:
+                max_age = timedelta(hours=max_age_hours) if max_age_hours else None
+                selection = select_tests(test_cases, self.storage.iter_results(), max_age=max_age)
+                if selection['reevaluate']:
+                    reevaluated = self.runner.reevaluate(
+                        [test_case for test_case, _ in selection['reevaluate']],
+                        [self.storage.hydrate(stored) for _, stored in selection['reevaluate']],
+                        [self.storage.load_text(stored, 'response') for _, stored in selection['reevaluate']],
+                        run_id=job_id
+                    )
+                    self.storage.save_results(reevaluated)
+                    self._count(job, reevaluated)
+                    job['reevaluated'] = len(reevaluated)
+                job['skipped'] = len(selection['skip'])
+                test_cases = selection['run']
+
+            estimate = preflight(test_cases, self.runner.token_counter, history)
+            job['estimate'] = {k: estimate[k] for k in ('input_tokens', 'expected_cost', 'max_cost', 'expected_duration')}
+            self._save(job)
+
+            for start in range(0, len(test_cases), self.chunk_size):
+                # Failures among re-evaluated tests count towards fail_fast too
+                remaining = fail_fast - job['failed'] if fail_fast else None
+                if remaining is not None and remaining <= 0:
+                    break
+                chunk = test_cases[start:start + self.chunk_size]
+                results = self.runner.run_tests(
+                    chunk,
+                    run_id=job_id,
+                    max_workers=max_workers,
+                    fail_fast=remaining,
+                    budget=budget
+                )
+                self.storage.save_results(results)
+                self._count(job, results)
+                job['spent'] = budget.spent
+                self._save(job)
+                if budget.stopped or len(results) < len(chunk):
+                    break
+
+            not_run = job['total'] - job['done'] - job['skipped']
+            if budget.cancelled:
+                job['status'] = "cancelled"
+            else:
+                job['status'] = "completed"
+                if fail_fast and job['failed'] >= fail_fast:
+                    job['message'] = f"Stopped after {job['failed']} failure(s); {not_run} test(s) not run"
+                elif budget.stopped:
+                    job['message'] = f"Spend cap of ${budget.limit:.2f} reached; {not_run} test(s) not run"
+        except Exception as e:
+            job['status'] = "failed"
+            job['error'] = str(e)
+        finally:
+            job['finished'] = datetime.now().isoformat()
+            job['spent'] = budget.spent
+            self._save(job)
+            with self._lock:
+                self._active.pop(job_id, None)
+            self._cancel_file(job_id).unlink(missing_ok=True)
+
+    @staticmethod
+    def _count(job: Dict[str, Any], results):
+        job['done'] += len(results)
+        job['passed'] += sum(r.passed is True for r in results)
+        job['failed'] += sum(r.passed is False for r in results)
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.api.client import create_provider
+from src.storage.locking import file_lock, atomic_write_json
+from src.utils.helpers import estimate_tokens, estimate_cost
+
+JUDGE_SYSTEM_PROMPT = (
+    "You are a strict grader of AI responses. Decide whether the response satisfies the rubric. "
+    'Reply with only a JSON object: {"passed": true or false, "reason": "<one sentence>"}'
+)
+
+class Judge:
+    """
+    LLM-as-judge grader.
+
+    Grades (rubric, response) pairs with a configured provider, running
+    uncached gradings concurrently. Verdicts are cached on disk by a hash of
+    the judge model, rubric and response. One instance is shared by every
+    evaluating thread, so the cache is guarded by a lock.
+    Set JUDGE_PROVIDER / JUDGE_MODEL to choose the grading model.
+    """
+
+    def __init__(
+        self,
+        provider_name: Optional[str] = None,
+        model: Optional[str] = None,
+        cache_file: str = "data/judge_cache.json",
+        max_workers: int = 8
+    ):
+        self.provider_name = provider_name or os.getenv("JUDGE_PROVIDER", "claude")
+        self.model = model or os.getenv("JUDGE_MODEL", "claude-sonnet-4-20250514")
+        self.cache_file = Path(cache_file)
+        self.max_workers = max_workers
+        self._provider = None
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.cache_file.exists():
+            with open(self.cache_file, 'r') as f:
+                self._cache = json.load(f)
+
+    def _get_provider(self):
+        with self._lock:
+            if self._provider is None:
+                self._provider = create_provider(self.provider_name)
+            return self._provider
+
+    def cache_key(self, rubric: str, response: str) -> str:
+        payload = json.dumps([self.model, rubric, response])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def grade_batch(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Grade (rubric, response) pairs.
+        Returns one verdict per item: passed, reason, latency, cost, cached (and error on failure).
+        """
+        keys = [self.cache_key(rubric, response) for rubric, response in items]
+        verdicts: Dict[str, Dict[str, Any]] = {}
+        todo: Dict[str, Tuple[str, str]] = {}
+
+        with self._lock:
+            for key, item in zip(keys, items):
+                if key in self._cache:
+                    verdicts[key] = {**self._cache[key], 'latency': 0.0, 'cost': 0.0, 'cached': True}
+                else:
+                    todo[key] = item
+
+        if todo:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                graded = pool.map(lambda item: self._grade(*item), todo.values())
+                for key, verdict in zip(todo, graded):
+                    verdicts[key] = verdict
+            with self._lock:
+                for key, verdict in verdicts.items():
+                    if key in todo and 'error' not in verdict:
+                        self._cache[key] = {'passed': verdict['passed'], 'reason': verdict['reason']}
+                self._save_cache()
+
+        return [verdicts[key] for key in keys]
+
+    def _grade(self, rubric: str, response: str) -> Dict[str, Any]:
+        prompt = f"Rubric:\n{rubric}\n\nResponse:\n{response}"
+        start_time = time.time()
+
+        try:
+            output = self._get_provider().generate(
+                prompt=prompt,
+                model=self.model,
+                system_prompt=JUDGE_SYSTEM_PROMPT,
+                temperature=0.0,
+                max_tokens=256
+            )
+        except Exception as e:
+            return {'passed': False, 'reason': '', 'error': str(e),
+                    'latency': time.time() - start_time, 'cost': 0.0, 'cached': False}
+
+        latency = time.time() - start_time
+        cost = estimate_cost(
+            self.model,
+            estimate_tokens(JUDGE_SYSTEM_PROMPT + prompt),
+            estimate_tokens(output)
+        )
+        passed, reason = self._parse_verdict(output)
+        return {'passed': passed, 'reason': reason, 'latency': latency, 'cost': cost, 'cached': False}
+
+    @staticmethod
+    def _parse_verdict(output: str) -> Tuple[bool, str]:
+        match = re.search(r"\{.*\}", output, re.DOTALL)
+        if match:
+            try:
+                data = json.loads(match.group(0))
+                return bool(data.get('passed')), str(data.get('reason', ''))
+            except json.JSONDecodeError:
+                pass
+        # Fall back to a bare PASS/FAIL answer
+        return output.strip().upper().startswith("PASS"), output.strip()
+
+    def _save_cache(self):
+        # Called with the lock held
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Merge with verdicts other processes saved since we loaded
+        with file_lock(self.cache_file):
+            if self.cache_file.exists():
+                with open(self.cache_file, 'r') as f:
+                    self._cache = {**json.load(f), **self._cache}
+            atomic_write_json(self.cache_file, self._cache, indent=2)
@@ -0,0 +1,119 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from src.storage.locking import atomic_write_json
+
+# Timing metrics recorded per generation (see TestResult.samples)
+METRICS = ("latency", "ttft")
+
+def percentile(values: List[float], p: float) -> float:
+    """p-th percentile (0-100) with linear interpolation between samples"""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def result_timings(result: dict) -> List[Dict[str, Any]]:
+    """Per-generation timings of a stored result (one entry per turn for conversations)"""
+    if result.get('samples'):
+        return result['samples']
+    if result.get('turn_results'):
+        return result['turn_results']
+    # Saved before timings were recorded
+    return [{'latency': result['execution_time']}]
+
+def latency_profile(results: Iterable[dict], run_id: str) -> Dict[str, Dict[str, Any]]:
+    """Latency and TTFT samples per test in a run, skipping errored results"""
+    profile: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        if result.get('run_id') != run_id or result.get('error'):
+            continue
+        test = profile.setdefault(result['test_id'], {'test_name': result['test_name'], **{m: [] for m in METRICS}})
+        for timing in result_timings(result):
+            for metric in METRICS:
+                if timing.get(metric) is not None:
+                    test[metric].append(timing[metric])
+    return profile
+
+def save_baseline(results: Iterable[dict], run_id: str, path: str = "data/latency_baseline.json") -> Dict[str, Any]:
+    """Store a run's latency samples as the baseline later runs are gated against"""
+    baseline = {
+        'run_id': run_id,
+        'created': datetime.now().isoformat(),
+        'tests': latency_profile(results, run_id)
+    }
+    if not baseline['tests']:
+        raise ValueError(f"Run {run_id} has no results with timings")
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_json(path, baseline)
+    return baseline
+
+def load_baseline(path: str = "data/latency_baseline.json") -> Optional[Dict[str, Any]]:
+    if not Path(path).exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def latency_gate(
+    results: Iterable[dict],
+    run_id: str,
+    baseline: Dict[str, Any],
+    threshold: float = 0.2,
+    min_delta: float = 0.1,
+    p: float = 95
+) -> Dict[str, Any]:
+    """
+    Compare a run's latency distribution with a baseline.
+
+    Samples of the tests present in both are pooled per metric (latency, and TTFT where
+    both recorded it). The gate fails when a metric's p-th percentile rose by more than
+    `threshold` (fraction) and more than `min_delta` seconds. Tests whose own percentile
+    regressed the same way are listed as well, but don't fail the gate on their own,
+    since a test with a few samples is too noisy to gate on.
+    """
+    head = latency_profile(results, run_id)
+    base = baseline['tests']
+    compared = [test_id for test_id in head if test_id in base]
+
+    def check(base_values: List[float], head_values: List[float]) -> Optional[Dict[str, Any]]:
+        if not base_values or not head_values:
+            return None
+        base_p, head_p = percentile(base_values, p), percentile(head_values, p)
+        delta = head_p - base_p
+        return {
+            'base': base_p,
+            'head': head_p,
+            'delta': delta,
+            'base_samples': len(base_values),
+            'head_samples': len(head_values),
+            'regressed': delta > min_delta and delta > base_p * threshold
+        }
+
+    metrics = {}
+    for metric in METRICS:
+        outcome = check(
+            [v for test_id in compared for v in base[test_id][metric]],
+            [v for test_id in compared for v in head[test_id][metric]]
+        )
+        if outcome:
+            metrics[metric] = outcome
+
+    regressions = []
+    for test_id in compared:
+        for metric in METRICS:
+            outcome = check(base[test_id][metric], head[test_id][metric])
+            if outcome and outcome['regressed']:
+                regressions.append({'test_id': test_id, 'test_name': head[test_id]['test_name'], 'metric': metric, **outcome})
+    regressions.sort(key=lambda r: -r['delta'])
+
+    return {
+        'run_id': run_id,
+        'baseline_run_id': baseline['run_id'],
+        'percentile': p,
+        'compared': len(compared),
+        'passed': bool(compared) and not any(m['regressed'] for m in metrics.values()),
+        'metrics': metrics,
+        'regressions': regressions
+    }
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Literal, Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -9,6 +9,13 @@ class EvaluationType(str, Enum):
     REGEX = "regex"
     LENGTH_MIN = "length_min"
     LENGTH_MAX = "length_max"
+    SEMANTIC_SIMILARITY = "semantic_similarity"
+    JUDGE = "judge"
+    JSON_VALID = "json_valid"
+    JSON_SCHEMA = "json_schema"
+    LATENCY_MAX = "latency_max"
+    TTFT_MAX = "ttft_max"
+    TOKENS_PER_SEC_MIN = "tokens_per_sec_min"
     MANUAL = "manual"
 
 class Expectation(BaseModel):
@@ -16,6 +23,11 @@ class Expectation(BaseModel):
     value: Any
     description: Optional[str] = None
 
+class Turn(BaseModel):
+    """A follow-up user message in a multi-turn test, with checks on the reply to it"""
+    content: str
+    expectations: List[Expectation] = []
+
 class TestCase(BaseModel):
     id: str
     name: str
@@ -26,7 +38,10 @@ class TestCase(BaseModel):
     system_prompt: Optional[str] = None
     temperature: float = 1.0
     max_tokens: int = 1024
-    created_at: datetime = datetime.now()
+    structured_output: bool = False
+    turns: List[Turn] = []  # Follow-up messages; `prompt` and `expectations` are the first turn
+    samples: int = 1  # Times a single-prompt test is generated, for latency percentiles
+    created_at: datetime = Field(default_factory=datetime.now)
     tags: List[str] = []
 
 class TestResult(BaseModel):
@@ -38,6 +53,14 @@ class TestResult(BaseModel):
     model: str
     passed: Optional[bool] = None
     evaluation_results: List[Dict[str, Any]] = []
+    turn_results: List[Dict[str, Any]] = []
+    samples: List[Dict[str, Any]] = []  # Timing of each generation: latency, ttft, tokens_per_sec
     execution_time: float
-    timestamp: datetime = datetime.now()
+    judge_time: float = 0.0
+    judge_cost: float = 0.0
+    run_id: Optional[str] = None
+    fingerprint: Optional[str] = None
+    expectations_fingerprint: Optional[str] = None
+    reused_from_run: Optional[str] = None
+    timestamp: datetime = Field(default_factory=datetime.now)
     error: Optional[str] = None
\ No newline at end of file
@@ -1,60 +1,390 @@
+import json
+import threading
 import time
-from typing import Optional
-from src.core.models import TestCase, TestResult
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Dict, Any, Tuple, Union
+from src.core.models import TestCase, TestResult, EvaluationType, Expectation
 from src.core.evaluator import Evaluator
-from src.api.providers.claude import ClaudeProvider
-from src.api.providers.goose import GooseProvider
+from src.core.selection import generation_fingerprint, expectations_fingerprint
+from src.core.budget import RunBudget, BudgetExceeded, TokenCounter, charge
+from src.api.client import ProviderPool, create_provider
+from src.utils.helpers import estimate_tokens
+
+# Expectations that need the reply streamed to time its first token
+STREAMED_TYPES = (EvaluationType.TTFT_MAX, EvaluationType.TOKENS_PER_SEC_MIN)
+
+# Output rates over a shorter window after the first token (e.g. a reply that arrived
+# in one chunk) are noise, so none is recorded
+MIN_GENERATION_TIME = 0.1
 
 class TestRunner:
-    def __init__(self):
+    def __init__(self, token_cache_file: str = "data/token_cache.json"):
         self.evaluator = Evaluator()
         self.providers = {}
+        self._providers_lock = threading.Lock()
+        # Prices budgeted calls from the same counts preflight() estimates with
+        self.token_counter = TokenCounter(self._get_provider, token_cache_file)
     
     def _get_provider(self, provider_name: str):
-       if provider_name not in self.providers:
-           if provider_name == "claude":
-                self.providers[provider_name] = ClaudeProvider()
-           elif provider_name == "openai":
-                self.providers[provider_name] = OpenAIProvider()
-           elif provider_name == "goose":  
-                self.providers[provider_name] = GooseProvider()
-           else:
-                raise ValueError(f"Unknown provider: {provider_name}")
-       return self.providers[provider_name]
-    
-    def run_test(self, test_case: TestCase) -> TestResult:
-        """Execute a single test case"""
-        start_time = time.time()
-        
+        # Locked so concurrent calls share one client (and one pool's cooldown state)
+        with self._providers_lock:
+            if provider_name not in self.providers:
+                self.providers[provider_name] = create_provider(provider_name)
+            return self.providers[provider_name]
+
+    def pool_stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Per-key stats (see ProviderPool.stats) of each provider used so far with several keys"""
+        with self._providers_lock:
+            pools = {name: provider for name, provider in self.providers.items() if isinstance(provider, ProviderPool)}
+        return {name: pool.stats() for name, pool in pools.items()}
+
+    def run_test(self, test_case: TestCase, run_id: Optional[str] = None, budget: Optional[RunBudget] = None) -> Optional[TestResult]:
+        """Execute a single test case (None if the budget stopped it from being dispatched)"""
+        results = self.run_tests([test_case], run_id=run_id, budget=budget)
+        return results[0] if results else None
+
+    def run_tests(
+        self,
+        test_cases: List[TestCase],
+        run_id: Optional[str] = None,
+        max_workers: int = 1,
+        fail_fast: Optional[int] = None,
+        budget: Optional[RunBudget] = None
+    ) -> List[TestResult]:
+        """
+        Execute test cases, then evaluate all responses in one batch.
+        With max_workers > 1 calls are made concurrently (e.g. one or more per pooled API key).
+        With fail_fast=N each response is evaluated as soon as it arrives and the run stops after N failures;
+        only the results of completed tests are returned.
+        With a budget, calls stop being dispatched once its spend cap is reached; tests that
+        weren't (fully) run are left out of the results.
+        """
+        if fail_fast:
+            return self._run_fail_fast(test_cases, run_id, max_workers, fail_fast, budget)
+
+        results: List[Optional[TestResult]] = [None] * len(test_cases)
+        single = [i for i, test_case in enumerate(test_cases) if not test_case.turns]
+        conversations = [i for i, test_case in enumerate(test_cases) if test_case.turns]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for i, result in zip(single, pool.map(partial(self._execute, budget=budget), [test_cases[i] for i in single])):
+                results[i] = result
+            if conversations:
+                executed = self._execute_conversations([test_cases[i] for i in conversations], pool, budget)
+                for i, result in zip(conversations, executed):
+                    results[i] = result
+        if budget:
+            self.token_counter.save()
+
+        test_cases = [test_case for test_case, result in zip(test_cases, results) if result is not None]
+        results = [result for result in results if result is not None]
+        self._evaluate(results, test_cases, run_id)
+        return results
+
+    def _run_fail_fast(self, test_cases: List[TestCase], run_id: Optional[str], max_workers: int, max_failures: int, budget: Optional[RunBudget]) -> List[TestResult]:
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        futures = {pool.submit(self._execute_one, test_case, budget): i for i, test_case in enumerate(test_cases)}
+        completed: Dict[int, TestResult] = {}
+        failures = 0
         try:
-            provider = self._get_provider(test_case.provider)
-            
-            response = provider.generate(
+            for future in as_completed(futures):
+                i = futures[future]
+                result = future.result()
+                if result is None:
+                    continue
+                self._evaluate([result], [test_cases[i]], run_id)
+                completed[i] = result
+                if result.passed is False:
+                    failures += 1
+                    if failures >= max_failures:
+                        break
+        finally:
+            # Drop calls that haven't started; ones already in flight finish in the background and are discarded
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=False)
+            if budget:
+                self.token_counter.save()
+        return [completed[i] for i in sorted(completed)]
+
+    def reevaluate(self, test_cases: List[TestCase], stored_results: List[Dict[str, Any]], responses: List[str], run_id: Optional[str] = None) -> List[TestResult]:
+        """
+        Check stored responses against the test cases' current expectations without calling the model.
+        Used when only a test's expectations changed since its last run; execution_time is the original generation's.
+        """
+        results = [
+            TestResult(
+                test_id=test_case.id,
+                test_name=test_case.name,
                 prompt=test_case.prompt,
+                response=response,
+                provider=test_case.provider,
                 model=test_case.model,
-                system_prompt=test_case.system_prompt,
-                temperature=test_case.temperature,
-                max_tokens=test_case.max_tokens
+                execution_time=stored['execution_time'],
+                turn_results=[dict(turn) for turn in stored.get('turn_results', [])],
+                samples=stored.get('samples', []),
+                reused_from_run=stored.get('run_id')
             )
-            
-            execution_time = time.time() - start_time
-            
-            # Evaluate response
-            passed, evaluation_results = self.evaluator.evaluate(
-                response, test_case.expectations
+            for test_case, stored, response in zip(test_cases, stored_results, responses)
+        ]
+        self._evaluate(results, test_cases, run_id)
+        return results
+
+    def _evaluate(self, results: List[TestResult], test_cases: List[TestCase], run_id: Optional[str]):
+        for result, test_case in zip(results, test_cases):
+            result.run_id = run_id
+            result.fingerprint = generation_fingerprint(test_case)
+            result.expectations_fingerprint = expectations_fingerprint(test_case)
+
+        pending = [(r, tc) for r, tc in zip(results, test_cases) if r.error is None]
+        # Conversations contribute one item per turn: the reply to that turn and its expectations
+        items, timings, owners = [], [], []
+        for n, (result, test_case) in enumerate(pending):
+            if test_case.turns:
+                turn_expectations = [test_case.expectations] + [turn.expectations for turn in test_case.turns]
+                for turn, expectations in zip(result.turn_results, turn_expectations):
+                    items.append((turn['response'], expectations))
+                    timings.append([turn])
+                    owners.append((n, turn))
+            else:
+                items.append((result.response, test_case.expectations))
+                timings.append(result.samples or [{'latency': result.execution_time}])
+                owners.append((n, None))
+
+        evaluations: Dict[int, List[Tuple[Optional[Dict[str, Any]], Optional[bool], List[Dict[str, Any]]]]] = {}
+        for (n, turn), (passed, evaluation_results) in zip(owners, self.evaluator.evaluate_batch(items, timings)):
+            evaluations.setdefault(n, []).append((turn, passed, evaluation_results))
+
+        for n, (result, _) in enumerate(pending):
+            outcomes = evaluations.get(n, [])
+            if outcomes and outcomes[0][0] is None:
+                _, result.passed, result.evaluation_results = outcomes[0]
+            else:
+                for turn, passed, evaluation_results in outcomes:
+                    turn['passed'] = passed
+                    turn['evaluation_results'] = evaluation_results
+                    result.evaluation_results.extend(dict(r, turn=turn['turn']) for r in evaluation_results)
+                verdicts = [passed for _, passed, _ in outcomes if passed is not None]
+                result.passed = all(verdicts) if verdicts else None
+            # Grading overhead is tracked apart from the test's own execution_time
+            result.judge_time = sum(r.get('judge_latency', 0.0) for r in result.evaluation_results)
+            result.judge_cost = sum(r.get('judge_cost', 0.0) for r in result.evaluation_results)
+
+    @staticmethod
+    def _response_schema(test_case: TestCase, expectations: Optional[List[Expectation]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Schema to request provider-side structured output with, if the test opts in.
+        Derived from the checks on the reply being generated (by default the first turn's).
+        """
+        if not test_case.structured_output:
+            return None
+        if expectations is None:
+            expectations = test_case.expectations
+        for exp in expectations:
+            if exp.type == EvaluationType.JSON_SCHEMA:
+                return Evaluator.schema_value(exp.value)
+        if any(exp.type == EvaluationType.JSON_VALID for exp in expectations):
+            return {"type": "object"}
+        return None
+
+    @staticmethod
+    def _streams(expectations: List[Expectation]) -> bool:
+        """Whether the reply checked by these expectations must be streamed (TTFT or tokens/sec checks)"""
+        return any(exp.type in STREAMED_TYPES for exp in expectations)
+
+    def _execute_one(self, test_case: TestCase, budget: Optional[RunBudget] = None) -> Optional[TestResult]:
+        if test_case.turns:
+            return self._execute_conversations([test_case], budget=budget)[0]
+        return self._execute(test_case, budget)
+
+    def _generate(
+        self,
+        test_case: TestCase,
+        messages: List[Dict[str, str]],
+        budget: Optional[RunBudget] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stream: bool = False
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        One model call for a test, charged against the run budget if there is one.
+        `json_schema` requests structured output (see _response_schema).
+        Returns the reply and its timing: latency and, when streamed, time to first token and
+        output tokens per second after the first token (None for windows under MIN_GENERATION_TIME).
+        """
+        provider = self._get_provider(test_case.provider)
+        if budget:
+            # Counting may be a remote call (Anthropic's count endpoint), so only a real cap pays for it
+            if budget.capped:
+                input_tokens = self.token_counter.count(test_case.provider, test_case.model, messages, test_case.system_prompt)
+            else:
+                input_tokens = estimate_tokens((test_case.system_prompt or "") + "".join(m["content"] for m in messages))
+            reserved = charge(test_case.model, input_tokens, test_case.max_tokens)
+            budget.reserve(reserved)
+
+        first_token: List[float] = []
+        kwargs = dict(
+            model=test_case.model,
+            system_prompt=test_case.system_prompt,
+            temperature=test_case.temperature,
+            max_tokens=test_case.max_tokens,
+            json_schema=json_schema,
+            on_first_token=(lambda: first_token.append(time.time())) if stream else None
+        )
+        start_time = time.time()
+        try:
+            if len(messages) == 1:
+                response = provider.generate(prompt=messages[0]["content"], **kwargs)
+            else:
+                response = provider.chat(messages=messages, **kwargs)
+        except Exception:
+            if budget:
+                budget.settle(reserved)
+            raise
+
+        latency = time.time() - start_time
+        output_tokens = estimate_tokens(response)
+        if budget:
+            budget.settle(reserved, charge(test_case.model, input_tokens, output_tokens))
+
+        ttft = first_token[0] - start_time if first_token else None
+        generation_time = latency - ttft if ttft is not None else 0.0
+        return response, {
+            'latency': latency,
+            'ttft': ttft,
+            'tokens_per_sec': output_tokens / generation_time if generation_time >= MIN_GENERATION_TIME else None
+        }
+
+    def _execute_conversations(
+        self,
+        test_cases: List[TestCase],
+        pool: Optional[ThreadPoolExecutor] = None,
+        budget: Optional[RunBudget] = None
+    ) -> List[Optional[TestResult]]:
+        """
+        Generate multi-turn conversations as a prefix tree.
+
+        Conversations with the same provider, model, parameters and leading user messages
+        (each requesting the same structured output schema) share the replies to those
+        messages, so each distinct prefix is generated once and then branched. All turns
+        at the same depth of the tree are generated concurrently. A shared reply is streamed
+        if any conversation sharing it checks its TTFT or tokens/sec.
+        """
+        settings: Dict[str, TestCase] = {}
+        paths = []
+        streamed = set()
+        for test_case in test_cases:
+            key = json.dumps([
+                test_case.provider, test_case.model, test_case.system_prompt,
+                test_case.temperature, test_case.max_tokens
+            ], sort_keys=True)
+            settings.setdefault(key, test_case)
+            # One step per turn: the user message and the schema its reply is generated with
+            turn_expectations = [test_case.expectations] + [turn.expectations for turn in test_case.turns]
+            steps = tuple(
+                (content, json.dumps(self._response_schema(test_case, expectations), sort_keys=True))
+                for content, expectations in zip(
+                    [test_case.prompt] + [turn.content for turn in test_case.turns], turn_expectations
+                )
             )
-            
+            path = (key,) + steps
+            paths.append(path)
+            # Turn n's reply is the node path[:n + 2]
+            streamed.update(path[:n + 2] for n, expectations in enumerate(turn_expectations) if self._streams(expectations))
+
+        # Tree node (settings key + steps so far) -> (reply, timing) or the exception raised
+        replies: Dict[tuple, Union[Tuple[str, Dict[str, Any]], Exception]] = {}
+        shared: Dict[tuple, int] = {}
+        for path in paths:
+            for depth in range(2, len(path) + 1):
+                shared[path[:depth]] = shared.get(path[:depth], 0) + 1
+
+        def reply(node: tuple) -> Union[Tuple[str, Dict[str, Any]], Exception]:
+            parent = replies.get(node[:-1])
+            if isinstance(parent, Exception):
+                return parent
+            messages = []
+            for depth in range(2, len(node) + 1):
+                messages.append({"role": "user", "content": node[depth - 1][0]})
+                if depth < len(node):
+                    messages.append({"role": "assistant", "content": replies[node[:depth]][0]})
+            try:
+                return self._generate(settings[node[0]], messages, budget, json.loads(node[-1][1]), node in streamed)
+            except Exception as e:
+                return e
+
+        for depth in range(2, max(len(path) for path in paths) + 1):
+            nodes = list(dict.fromkeys(path[:depth] for path in paths if len(path) >= depth))
+            outputs = pool.map(reply, nodes) if pool else map(reply, nodes)
+            replies.update(zip(nodes, outputs))
+
+        results = []
+        for test_case, path in zip(test_cases, paths):
+            turn_results, error = [], None
+            for depth in range(2, len(path) + 1):
+                output = replies[path[:depth]]
+                if isinstance(output, BudgetExceeded):
+                    break
+                if isinstance(output, Exception):
+                    error = f"Turn {depth - 2}: {output}"
+                    break
+                turn_results.append({
+                    'turn': depth - 2,
+                    'content': path[depth - 1][0],
+                    'response': output[0],
+                    **output[1],
+                    'shared': shared[path[:depth]] > 1
+                })
+
+            if isinstance(output, BudgetExceeded):
+                results.append(None)
+                continue
+            results.append(TestResult(
+                test_id=test_case.id,
+                test_name=test_case.name,
+                prompt=test_case.prompt,
+                response=turn_results[-1]['response'] if turn_results and not error else "",
+                provider=test_case.provider,
+                model=test_case.model,
+                passed=False if error else None,
+                turn_results=turn_results,
+                # The conversation's own latency, counting shared turns as if it ran alone
+                execution_time=sum(turn['latency'] for turn in turn_results),
+                error=error
+            ))
+        return results
+
+    def _execute(self, test_case: TestCase, budget: Optional[RunBudget] = None) -> Optional[TestResult]:
+        """
+        Generate a response for a test case without evaluating it (None if the budget stopped it).
+        A test with samples > 1 is generated that many times in a row: content checks apply to the
+        first response, latency checks to all samples, and execution_time is their mean latency.
+        """
+        start_time = time.time()
+
+        try:
+            responses, samples = [], []
+            for _ in range(max(test_case.samples, 1)):
+                response, timing = self._generate(
+                    test_case, [{"role": "user", "content": test_case.prompt}], budget,
+                    self._response_schema(test_case), self._streams(test_case.expectations)
+                )
+                responses.append(response)
+                samples.append(timing)
+
             return TestResult(
                 test_id=test_case.id,
                 test_name=test_case.name,
                 prompt=test_case.prompt,
-                response=response,
+                response=responses[0],
                 provider=test_case.provider,
                 model=test_case.model,
-                passed=passed,
-                evaluation_results=evaluation_results,
-                execution_time=execution_time
+                samples=samples,
+                execution_time=sum(sample['latency'] for sample in samples) / len(samples)
             )
+
+        except BudgetExceeded:
+            return None
         
         except Exception as e:
             execution_time = time.time() - start_time
@@ -69,4 +399,4 @@ class TestRunner:
                 evaluation_results=[],
                 execution_time=execution_time,
                 error=str(e)
-            )
\ No newline at end of file
+            )
@@ -0,0 +1,41 @@
+from typing import Dict, Iterable, List
+from src.core.models import TestCase
+
+def result_history(results: Iterable[dict]) -> Dict[str, Dict[str, float]]:
+    """Per-test run count, failure count, mean execution time and mean response length from stored results"""
+    history: Dict[str, Dict[str, float]] = {}
+    for result in results:
+        stats = history.setdefault(result['test_id'], {'runs': 0, 'failures': 0, 'total_time': 0.0, 'total_length': 0})
+        stats['runs'] += 1
+        if result.get('passed') is False:
+            stats['failures'] += 1
+        stats['total_time'] += result.get('execution_time') or 0.0
+        stats['total_length'] += result.get('response_length', len(result.get('response') or ""))
+
+    for stats in history.values():
+        stats['mean_latency'] = stats.pop('total_time') / stats['runs']
+        stats['mean_response_length'] = stats.pop('total_length') / stats['runs']
+    return history
+
+def failure_likelihood(stats: Dict[str, float]) -> float:
+    # Laplace-smoothed, so a test with no history ranks between always-passing and always-failing ones
+    return (stats.get('failures', 0) + 1) / (stats.get('runs', 0) + 2)
+
+def prioritize(
+    test_cases: List[TestCase],
+    history: Dict[str, Dict[str, float]],
+    smoke_tag: str = "smoke"
+) -> List[TestCase]:
+    """
+    Order tests so likely failures surface first:
+    tests tagged `smoke_tag`, then by historical failure likelihood (highest first),
+    then by mean latency (fastest first)
+    """
+    def key(test_case: TestCase):
+        stats = history.get(test_case.id, {})
+        return (
+            smoke_tag not in test_case.tags,
+            -failure_likelihood(stats),
+            stats.get('mean_latency', 0.0)
+        )
+    return sorted(test_cases, key=key)
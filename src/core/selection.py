@@ -0,0 +1,85 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from src.core.models import TestCase, EvaluationType, Expectation
+
+def _digest(data: Any) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def generation_fingerprint(test_case: TestCase) -> str:
+    """Hash of everything that affects the generated response"""
+    fields = {
+        'provider': test_case.provider,
+        'model': test_case.model,
+        'prompt': test_case.prompt,
+        'system_prompt': test_case.system_prompt,
+        'temperature': test_case.temperature,
+        'max_tokens': test_case.max_tokens,
+        'structured_output': test_case.structured_output,
+    }
+    if test_case.turns:
+        fields['turns'] = [turn.content for turn in test_case.turns]
+    if test_case.samples > 1:
+        fields['samples'] = test_case.samples
+    if test_case.structured_output:
+        # The schema is sent to the provider, so it shapes the response too
+        fields['schemas'] = _schemas(test_case.expectations)
+        if test_case.turns:
+            fields['turn_schemas'] = [_schemas(turn.expectations) for turn in test_case.turns]
+    return _digest(fields)
+
+def _schemas(expectations: List[Expectation]) -> List[Dict[str, Any]]:
+    return [
+        exp.model_dump(mode="json") for exp in expectations
+        if exp.type in (EvaluationType.JSON_VALID, EvaluationType.JSON_SCHEMA)
+    ]
+
+def expectations_fingerprint(test_case: TestCase) -> str:
+    """Hash of the checks applied to the response (and to each later turn's reply)"""
+    checks = [exp.model_dump(mode="json") for exp in test_case.expectations]
+    if test_case.turns:
+        return _digest([checks] + [[exp.model_dump(mode="json") for exp in turn.expectations] for turn in test_case.turns])
+    return _digest(checks)
+
+def select_tests(
+    test_cases: List[TestCase],
+    results: Iterable[dict],
+    max_age: Optional[timedelta] = None
+) -> Dict[str, List]:
+    """
+    Decide which tests need a new generation.
+
+    Looks up the latest stored result (not older than `max_age`) with each
+    test's generation fingerprint and returns:
+      - 'skip': [(test_case, result)] - inputs and expectations unchanged and the result passed
+      - 'reevaluate': [(test_case, result)] - inputs unchanged but expectations changed;
+        the stored response can be re-checked without calling the model
+      - 'run': [test_case] - everything else (changed, never run, errored or failing)
+    """
+    wanted = {generation_fingerprint(tc): tc for tc in test_cases}
+    cutoff = datetime.now() - max_age if max_age else None
+    latest: Dict[str, dict] = {}
+
+    for result in results:
+        fingerprint = result.get('fingerprint')
+        if fingerprint not in wanted or result.get('error'):
+            continue
+        if cutoff and datetime.fromisoformat(str(result['timestamp'])) < cutoff:
+            continue
+        previous = latest.get(fingerprint)
+        if previous is None or str(result['timestamp']) >= str(previous['timestamp']):
+            latest[fingerprint] = result
+
+    selection: Dict[str, List] = {'skip': [], 'reevaluate': [], 'run': []}
+    for test_case in test_cases:
+        result = latest.get(generation_fingerprint(test_case))
+        if result is None:
+            selection['run'].append(test_case)
+        elif result.get('expectations_fingerprint') != expectations_fingerprint(test_case):
+            selection['reevaluate'].append((test_case, result))
+        elif result.get('passed') is True:
+            selection['skip'].append((test_case, result))
+        else:
+            selection['run'].append(test_case)
+    return selection
@@ -0,0 +1,294 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.core.models import TestCase
+from src.core.budget import BudgetExceeded
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    test_case TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (state, shard);
+CREATE INDEX IF NOT EXISTS idx_tasks_worker ON tasks (worker, state);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    max_cost REAL,
+    spent REAL NOT NULL DEFAULT 0,
+    stopped INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    worker TEXT NOT NULL,
+    cost REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reservations_run ON reservations (run_id);
+"""
+
+class WorkQueue:
+    """
+    SQLite-backed queue of test cases shared by a coordinator and its workers.
+
+    Tests are submitted in shards. A worker leases a whole shard, marks each
+    test running just before executing it, and marks it done afterwards.
+    Workers renew their leases from a heartbeat while they run; leases expire
+    after `lease_timeout` seconds without renewal, returning a crashed or stalled
+    worker's tests to the queue (up to `max_attempts` executions).
+    When no shard is pending, an idle worker steals the not-yet-started half
+    of the busiest worker's lease. complete() refuses a task whose lease was
+    taken over, so a test re-run after its lease expired is recorded only once.
+
+    A run may have a spend cap shared by all workers (see QueueBudget); once it is
+    reached, the run's remaining tests are skipped.
+
+    Task states: pending -> leased -> running -> done (or failed, or skipped).
+    The database uses WAL mode, so every worker must run on the same host
+    (not over a network filesystem).
+    """
+
+    def __init__(self, db_path: str = "data/queue.db", lease_timeout: float = 300.0, max_attempts: int = 3):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            # Take the write lock up front so concurrent claims can't both read the same pending shard
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # Coordinator
+    def submit_run(self, run_id: str, test_cases: List[TestCase], shard_size: int = 10, max_cost: Optional[float] = None) -> int:
+        """
+        Enqueue test cases for a run, `shard_size` tests per shard, optionally capping the
+        run's spend at `max_cost` USD. Returns the number of shards
+        """
+        rows = [
+            (run_id, f"{run_id}:{i // shard_size}", test_case.model_dump_json())
+            for i, test_case in enumerate(test_cases)
+        ]
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO runs (run_id, max_cost) VALUES (?, ?)", (run_id, max_cost))
+            conn.executemany("INSERT INTO tasks (run_id, shard, test_case) VALUES (?, ?, ?)", rows)
+        return (len(rows) + shard_size - 1) // shard_size
+
+    def run_progress(self, run_id: str) -> Dict[str, int]:
+        """Task counts by state for a run"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT state, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY state", (run_id,)
+            ).fetchall()
+        progress = {'pending': 0, 'leased': 0, 'running': 0, 'done': 0, 'failed': 0, 'skipped': 0}
+        progress.update(dict(rows))
+        return progress
+
+    def run_spend(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """A run's spend cap (None if uncapped), spend so far and whether the cap stopped it"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT max_cost, spent, stopped FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        return {'max_cost': row[0], 'spent': row[1], 'stopped': bool(row[2])}
+
+    # Workers
+    def claim(self, worker_id: str) -> List[Tuple[int, str, TestCase]]:
+        """
+        Lease work for a worker: a pending shard if there is one, otherwise
+        half of the busiest worker's unstarted tasks. Returns (task_id, run_id, test_case) tuples.
+        """
+        now = time.time()
+        expires = now + self.lease_timeout
+
+        with self._transaction() as conn:
+            self._reclaim_expired(conn, now)
+
+            row = conn.execute(
+                "SELECT shard FROM tasks WHERE state = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE tasks SET state = 'leased', worker = ?, lease_expires = ? "
+                    "WHERE shard = ? AND state = 'pending'",
+                    (worker_id, expires, row[0])
+                )
+            else:
+                self._steal(conn, worker_id, expires)
+
+            tasks = conn.execute(
+                "SELECT id, run_id, test_case FROM tasks WHERE worker = ? AND state = 'leased' ORDER BY id",
+                (worker_id,)
+            ).fetchall()
+
+        return [(task_id, run_id, TestCase.model_validate_json(data)) for task_id, run_id, data in tasks]
+
+    def _reclaim_expired(self, conn: sqlite3.Connection, now: float):
+        conn.execute(
+            "UPDATE tasks SET state = 'failed' WHERE state IN ('leased', 'running') "
+            "AND lease_expires < ? AND attempts >= ?",
+            (now, self.max_attempts)
+        )
+        conn.execute(
+            "UPDATE tasks SET state = 'pending', worker = NULL, lease_expires = NULL "
+            "WHERE state IN ('leased', 'running') AND lease_expires < ?",
+            (now,)
+        )
+
+    def _steal(self, conn: sqlite3.Connection, worker_id: str, expires: float):
+        victim = conn.execute(
+            "SELECT worker, COUNT(*) AS n FROM tasks WHERE state = 'leased' AND worker != ? "
+            "GROUP BY worker ORDER BY n DESC LIMIT 1",
+            (worker_id,)
+        ).fetchone()
+        if not victim or victim[1] < 2:
+            return
+        victim_id, leased = victim
+        # Take the tail of the victim's lease; it works through its tasks from the front
+        conn.execute(
+            "UPDATE tasks SET worker = ?, lease_expires = ? WHERE id IN ("
+            "SELECT id FROM tasks WHERE worker = ? AND state = 'leased' ORDER BY id DESC LIMIT ?)",
+            (worker_id, expires, victim_id, leased // 2)
+        )
+
+    def start(self, task_id: int, worker_id: str) -> bool:
+        """Mark a leased task running. False if it was stolen or reassigned in the meantime"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET state = 'running', attempts = attempts + 1, lease_expires = ? "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (time.time() + self.lease_timeout, task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker_id: str) -> bool:
+        """Mark a running task done. False if its lease expired and it was handed to another worker"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET state = 'done', lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND state = 'running'",
+                (task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def skip(self, task_id: int, worker_id: str) -> bool:
+        """Mark a running task skipped (its run's spend cap was reached before it could run)"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET state = 'skipped', lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND state = 'running'",
+                (task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, worker_id: str):
+        """Extend the lease on everything this worker holds"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE worker = ? AND state IN ('leased', 'running')",
+                (time.time() + self.lease_timeout, worker_id)
+            )
+
+    def is_drained(self, run_id: Optional[str] = None) -> bool:
+        """True when no task (of the run, if given) is waiting or in progress"""
+        query = "SELECT COUNT(*) FROM tasks WHERE state IN ('pending', 'leased', 'running')"
+        params: tuple = ()
+        if run_id:
+            query += " AND run_id = ?"
+            params = (run_id,)
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchone()[0] == 0
+
+class QueueBudget:
+    """
+    A queued run's spend cap, shared by every worker through the queue database.
+
+    Works like budget.RunBudget across processes, for the calls of one running task:
+    each call reserves its worst-case cost before it is dispatched and settles to its
+    actual cost afterwards. A reservation only counts while its task is still leased by
+    the worker that made it, so a crashed worker's reservations lapse with its lease.
+    A call that only fits once calls in flight settle polls until they do; once a call
+    can't fit at all, the run is stopped and every later reservation fails. Runs submitted
+    without a cap only have their spend recorded.
+    """
+
+    def __init__(self, queue: WorkQueue, run_id: str, task_id: int, worker_id: str, poll_interval: float = 1.0):
+        self.queue = queue
+        self.run_id = run_id
+        self.task_id = task_id
+        self.worker_id = worker_id
+        self.poll_interval = poll_interval
+        spend = queue.run_spend(run_id)
+        self.capped = bool(spend) and spend['max_cost'] is not None
+
+    def reserve(self, cost: float):
+        while True:
+            with self.queue._transaction() as conn:
+                row = conn.execute(
+                    "SELECT max_cost, spent, stopped FROM runs WHERE run_id = ?", (self.run_id,)
+                ).fetchone()
+                if row is None:
+                    # Submitted before runs were recorded
+                    return
+                max_cost, spent, stopped = row
+                fits = not stopped
+                if fits and max_cost is not None:
+                    conn.execute(
+                        "DELETE FROM reservations WHERE run_id = ? AND NOT EXISTS ("
+                        "SELECT 1 FROM tasks WHERE tasks.id = reservations.task_id AND tasks.worker = reservations.worker "
+                        "AND tasks.state = 'running' AND tasks.lease_expires >= ?)",
+                        (self.run_id, time.time())
+                    )
+                    in_flight = conn.execute(
+                        "SELECT COALESCE(SUM(cost), 0) FROM reservations WHERE run_id = ?", (self.run_id,)
+                    ).fetchone()[0]
+                    if spent + cost > max_cost:
+                        conn.execute("UPDATE runs SET stopped = 1 WHERE run_id = ?", (self.run_id,))
+                        stopped, fits = True, False
+                    elif spent + in_flight + cost > max_cost:
+                        fits = False
+                if fits:
+                    conn.execute(
+                        "INSERT INTO reservations (run_id, task_id, worker, cost) VALUES (?, ?, ?, ?)",
+                        (self.run_id, self.task_id, self.worker_id, cost)
+                    )
+                    return
+            if stopped:
+                raise BudgetExceeded(f"Run budget of ${max_cost:.2f} reached (${spent:.4f} spent)")
+            time.sleep(self.poll_interval)
+
+    def settle(self, reserved: float, actual: float = 0.0):
+        """Release a reservation, charging `actual` (0.0 for calls that failed)"""
+        with self.queue._transaction() as conn:
+            conn.execute(
+                "DELETE FROM reservations WHERE id = (SELECT id FROM reservations "
+                "WHERE task_id = ? AND worker = ? AND cost = ? LIMIT 1)",
+                (self.task_id, self.worker_id, reserved)
+            )
+            conn.execute("UPDATE runs SET spent = spent + ? WHERE run_id = ?", (actual, self.run_id))
@@ -0,0 +1,189 @@
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+from src.core.models import TestCase
+from src.core.runner import TestRunner
+from src.core.budget import preflight
+from src.core.latency import latency_gate, load_baseline, save_baseline
+from src.core.scheduler import prioritize, result_history
+from src.core.selection import select_tests
+from src.core.work_queue import QueueBudget, WorkQueue
+from src.storage.manager import StorageManager
+
+class Worker:
+    """
+    Pulls test cases from a WorkQueue, runs them and saves the results to storage.
+    Calls are charged against their run's spend cap (see QueueBudget).
+    """
+
+    def __init__(self, queue: WorkQueue, storage: StorageManager, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.storage = storage
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.runner = TestRunner(storage.data_dir / "token_cache.json")
+
+    def run(self, poll_interval: float = 2.0, exit_when_idle: bool = False, concurrency: int = 1) -> int:
+        """
+        Process tasks until stopped (or, with exit_when_idle, until the queue is drained).
+        Up to `concurrency` tests run at once. Returns the number of tests run.
+        """
+        executed = 0
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(stop,), daemon=True)
+        heartbeat.start()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                while True:
+                    tasks = self.queue.claim(self.worker_id)
+                    if not tasks:
+                        if exit_when_idle and self.queue.is_drained():
+                            return executed
+                        time.sleep(poll_interval)
+                        continue
+                    executed += sum(pool.map(lambda task: self._run_task(*task), tasks))
+        finally:
+            stop.set()
+
+    def _heartbeat(self, stop: threading.Event):
+        # Keep leases alive through provider calls that outlast the lease timeout
+        while not stop.wait(self.queue.lease_timeout / 3):
+            self.queue.renew(self.worker_id)
+
+    def _run_task(self, task_id: int, run_id: str, test_case: TestCase) -> bool:
+        # Skip tasks another worker stole while we were busy
+        if not self.queue.start(task_id, self.worker_id):
+            return False
+        result = self.runner.run_test(
+            test_case, run_id=run_id, budget=QueueBudget(self.queue, run_id, task_id, self.worker_id)
+        )
+        if result is None:
+            # The run's spend cap was reached before the test could run
+            self.queue.skip(task_id, self.worker_id)
+            return False
+        # Drop the result if the lease was lost and the test handed to another worker
+        if not self.queue.complete(task_id, self.worker_id):
+            return False
+        self.storage.save_result(result)
+        return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed test execution over a shared SQLite queue")
+    parser.add_argument("--queue", default="data/queue.db", help="Path to the shared queue database")
+    parser.add_argument("--data-dir", default="data", help="Storage directory results are written to")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    submit = subparsers.add_parser("submit", help="Enqueue stored test cases as a new run")
+    submit.add_argument("--tag", action="append", help="Only tests with this tag (repeatable)")
+    submit.add_argument("--shard-size", type=int, default=10)
+    submit.add_argument("--changed-only", action="store_true",
+                        help="Skip tests unchanged since a passing result; re-check stored responses whose expectations changed")
+    submit.add_argument("--max-age-hours", type=float, help="With --changed-only, ignore results older than this")
+    submit.add_argument("--max-cost", type=float, help="Spend cap in USD shared by all workers; remaining tests are skipped once reached")
+
+    work = subparsers.add_parser("work", help="Start a worker")
+    work.add_argument("--lease-timeout", type=float, default=300.0)
+    work.add_argument("--exit-when-idle", action="store_true", help="Stop once the queue is drained")
+    work.add_argument("--concurrency", type=int, default=1, help="Tests run at once (e.g. per pooled API key)")
+
+    status = subparsers.add_parser("status", help="Show a run's progress")
+    status.add_argument("run_id")
+
+    baseline = subparsers.add_parser("baseline", help="Store a run's latencies as the baseline for the latency gate")
+    baseline.add_argument("run_id")
+    baseline.add_argument("--file", help="Baseline file (default: <data-dir>/latency_baseline.json)")
+
+    gate = subparsers.add_parser("gate", help="Fail (exit 1) if a run's p95 latency regressed against the baseline")
+    gate.add_argument("run_id")
+    gate.add_argument("--file", help="Baseline file (default: <data-dir>/latency_baseline.json)")
+    gate.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown as a fraction of the baseline")
+    gate.add_argument("--min-delta", type=float, default=0.1, help="Slowdowns of at most this many seconds always pass")
+    gate.add_argument("--percentile", type=float, default=95)
+
+    args = parser.parse_args()
+    storage = StorageManager(args.data_dir)
+
+    if args.command == "submit":
+        test_cases = [TestCase(**data) for data in storage.get_all_test_cases()]
+        if args.tag:
+            test_cases = [tc for tc in test_cases if set(args.tag) & set(tc.tags)]
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        runner = TestRunner(os.path.join(args.data_dir, "token_cache.json"))
+        if args.changed_only:
+            max_age = timedelta(hours=args.max_age_hours) if args.max_age_hours else None
+            selection = select_tests(test_cases, storage.iter_results(), max_age=max_age)
+            if selection['reevaluate']:
+                storage.save_results(runner.reevaluate(
+                    [test_case for test_case, _ in selection['reevaluate']],
+                    [storage.hydrate(stored) for _, stored in selection['reevaluate']],
+                    [storage.load_text(stored, 'response') for _, stored in selection['reevaluate']],
+                    run_id=run_id
+                ))
+            test_cases = selection['run']
+            print(f"{len(selection['skip'])} unchanged test(s) skipped, {len(selection['reevaluate'])} re-evaluated")
+        # Shards are claimed in submission order, so likely failures are picked up first
+        history = result_history(storage.iter_results())
+        test_cases = prioritize(test_cases, history)
+        estimate = preflight(test_cases, runner.token_counter, history)
+        print(
+            f"Estimated {estimate['input_tokens']:,} input tokens, "
+            f"${estimate['expected_cost']:.4f} expected (up to ${estimate['max_cost']:.4f})"
+        )
+        shards = WorkQueue(args.queue).submit_run(run_id, test_cases, shard_size=args.shard_size, max_cost=args.max_cost)
+        print(f"Submitted run {run_id}: {len(test_cases)} test(s) in {shards} shard(s)")
+
+    elif args.command == "work":
+        worker = Worker(WorkQueue(args.queue, lease_timeout=args.lease_timeout), storage)
+        print(f"Worker {worker.worker_id} started")
+        executed = worker.run(exit_when_idle=args.exit_when_idle, concurrency=args.concurrency)
+        print(f"Worker {worker.worker_id} finished: {executed} test(s) run")
+        for provider_name, stats in worker.runner.pool_stats().items():
+            for key in stats:
+                print(
+                    f"  {provider_name} {key['key']}: {key['requests']} request(s), "
+                    f"{key['throttled']} throttled, {key['errors']} error(s)"
+                )
+
+    elif args.command == "status":
+        queue = WorkQueue(args.queue)
+        print(queue.run_progress(args.run_id))
+        spend = queue.run_spend(args.run_id)
+        if spend and spend['max_cost'] is not None:
+            print(
+                f"Spent ${spend['spent']:.4f} of ${spend['max_cost']:.2f}"
+                + (" (cap reached, remaining tests skipped)" if spend['stopped'] else "")
+            )
+
+    elif args.command == "baseline":
+        path = args.file or os.path.join(args.data_dir, "latency_baseline.json")
+        saved = save_baseline(storage.iter_results({args.run_id}), args.run_id, path)
+        print(f"Saved latencies of {len(saved['tests'])} test(s) from run {args.run_id} to {path}")
+
+    elif args.command == "gate":
+        path = args.file or os.path.join(args.data_dir, "latency_baseline.json")
+        baseline = load_baseline(path)
+        if baseline is None:
+            sys.exit(f"No latency baseline at {path}; store one with: baseline <run_id>")
+        outcome = latency_gate(
+            storage.iter_results({args.run_id}), args.run_id, baseline,
+            threshold=args.threshold, min_delta=args.min_delta, p=args.percentile
+        )
+        print(f"Run {args.run_id} vs baseline {outcome['baseline_run_id']}: {outcome['compared']} test(s) compared")
+        for metric, m in outcome['metrics'].items():
+            print(
+                f"  {'REGRESSED' if m['regressed'] else 'ok':>9}  p{outcome['percentile']:g} {metric}: "
+                f"{m['base']:.2f}s -> {m['head']:.2f}s ({m['delta']:+.2f}s)"
+            )
+        for r in outcome['regressions']:
+            print(f"  slower: {r['test_name']} p{outcome['percentile']:g} {r['metric']} {r['base']:.2f}s -> {r['head']:.2f}s")
+        if not outcome['passed']:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import functools
+import io
+import json
+import operator
+from pathlib import Path
+from typing import Dict, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from src.storage.manager import StorageManager
+from src.storage.locking import file_lock, atomic_write_json
+
+RESULTS_SCHEMA = pa.schema([
+    ("test_id", pa.string()),
+    ("test_name", pa.string()),
+    ("run_id", pa.string()),
+    ("provider", pa.string()),
+    ("passed", pa.bool_()),
+    ("has_error", pa.bool_()),
+    ("execution_time", pa.float64()),
+    ("judge_time", pa.float64()),
+    ("judge_cost", pa.float64()),
+    ("response_length", pa.int64()),
+    ("timestamp", pa.timestamp("us")),
+    ("date", pa.string()),
+    ("model", pa.string()),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("date", pa.string()), ("model", pa.string())]), flavor="hive"
+)
+
+class ResultsAnalytics:
+    """
+    Columnar Parquet copy of the result history for analytics.
+
+    The dataset lives under data/analytics/, partitioned by date and model,
+    and holds only scalar columns (no prompt/response text). It is updated
+    incrementally: only results appended since the last refresh are converted.
+    """
+
+    def __init__(self, storage: StorageManager, dataset_dir: Optional[str] = None, batch_size: int = 50_000):
+        self.storage = storage
+        self.dataset_dir = Path(dataset_dir) if dataset_dir else storage.data_dir / "analytics"
+        self.state_file = self.dataset_dir / "_state.json"
+        self.batch_size = batch_size
+
+    def _load_state(self) -> Dict:
+        if self.state_file.exists():
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        return {'offset': 0, 'parts': 0}
+
+    def refresh(self):
+        """Convert results appended since the last refresh into new Parquet files"""
+        self.dataset_dir.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.state_file):
+            self._refresh()
+
+    def _refresh(self):
+        state = self._load_state()
+        size = self.storage.results_file.stat().st_size
+        if size < state['offset']:
+            # Results file was rewritten; rebuild from scratch
+            for part in self.dataset_dir.glob("date=*/**/*.parquet"):
+                part.unlink()
+            state = {'offset': 0, 'parts': 0}
+        if size == state['offset']:
+            return
+
+        end_offset = state['offset']
+        columns: Dict[str, List] = {name: [] for name in RESULTS_SCHEMA.names}
+        batches = []
+
+        for _, end_offset, result in self.storage.iter_results_with_offsets(state['offset']):
+            columns["test_id"].append(result['test_id'])
+            columns["test_name"].append(result.get('test_name'))
+            columns["run_id"].append(result.get('run_id'))
+            columns["provider"].append(result.get('provider'))
+            columns["passed"].append(result.get('passed'))
+            columns["has_error"].append(bool(result.get('error')))
+            columns["execution_time"].append(result.get('execution_time'))
+            columns["judge_time"].append(result.get('judge_time', 0.0))
+            columns["judge_cost"].append(result.get('judge_cost', 0.0))
+            columns["response_length"].append(result.get('response_length', len(result.get('response') or "")))
+            columns["timestamp"].append(str(result.get('timestamp')))
+            columns["model"].append(result.get('model'))
+            if len(columns["test_id"]) >= self.batch_size:
+                batches.append(self._to_batch(columns))
+                columns = {name: [] for name in RESULTS_SCHEMA.names}
+
+        if columns["test_id"]:
+            batches.append(self._to_batch(columns))
+
+        if batches:
+            ds.write_dataset(
+                batches,
+                self.dataset_dir,
+                schema=RESULTS_SCHEMA,
+                format="parquet",
+                partitioning=PARTITIONING,
+                basename_template=f"part-{state['parts']}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore"
+            )
+
+        atomic_write_json(self.state_file, {'offset': end_offset, 'parts': state['parts'] + 1})
+
+    @staticmethod
+    def _to_batch(columns: Dict[str, List]) -> pa.RecordBatch:
+        timestamps = pa.array(columns["timestamp"], pa.string()).cast(pa.timestamp("us"))
+        arrays = []
+        for field in RESULTS_SCHEMA:
+            if field.name == "timestamp":
+                arrays.append(timestamps)
+            elif field.name == "date":
+                arrays.append(pc.strftime(timestamps, format="%Y-%m-%d"))
+            else:
+                arrays.append(pa.array(columns[field.name], field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=RESULTS_SCHEMA)
+
+    def table(
+        self,
+        columns: Optional[List[str]] = None,
+        models: Optional[List[str]] = None,
+        statuses: Optional[List[Optional[bool]]] = None,
+        test_names: Optional[List[str]] = None
+    ) -> pa.Table:
+        """
+        Read the dataset (refreshing it first), pruning columns and model partitions.
+        `statuses` are passed values to keep (True, False, None for manual review).
+        """
+        self.refresh()
+        if not any(self.dataset_dir.glob("date=*")):
+            return RESULTS_SCHEMA.empty_table().select(columns or RESULTS_SCHEMA.names)
+        dataset = ds.dataset(self.dataset_dir, schema=RESULTS_SCHEMA, format="parquet", partitioning=PARTITIONING)
+
+        conditions = []
+        if models is not None:
+            conditions.append(ds.field("model").isin(models))
+        if test_names is not None:
+            conditions.append(ds.field("test_name").isin(test_names))
+        if statuses is not None:
+            matches = [ds.field("passed").is_null() if s is None else ds.field("passed") == s for s in statuses]
+            conditions.append(functools.reduce(operator.or_, matches) if matches else ds.scalar(False))
+        filter_expr = functools.reduce(operator.and_, conditions) if conditions else None
+        return dataset.to_table(columns=columns, filter=filter_expr)
+
+    def summary(self) -> Dict:
+        """Overall counts and mean latency"""
+        table = self.table(columns=["passed", "execution_time"])
+        passed = table["passed"]
+        return {
+            'total': table.num_rows,
+            'passed': pc.sum(pc.equal(passed, True)).as_py() or 0,
+            'failed': pc.sum(pc.equal(passed, False)).as_py() or 0,
+            'manual': passed.null_count,
+            'avg_time': pc.mean(table["execution_time"]).as_py() or 0.0
+        }
+
+    def pass_rate_over_time(self, models: Optional[List[str]] = None) -> pd.DataFrame:
+        """Daily pass rate (passed / all results), indexed by date"""
+        df = self.table(columns=["date", "passed"], models=models).to_pandas()
+        df["passed"] = df["passed"].eq(True)
+        return df.groupby("date")["passed"].mean().rename("pass_rate").to_frame()
+
+    def latency_percentiles_by_model(
+        self,
+        percentiles: tuple = (0.5, 0.9, 0.95, 0.99),
+        models: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Execution time percentiles per model (one column per percentile)"""
+        df = self.table(columns=["model", "execution_time"], models=models).to_pandas()
+        columns = [f"p{round(p * 100)}" for p in percentiles]
+        if df.empty:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name="model"), dtype=float)
+        quantiles = df.groupby("model")["execution_time"].quantile(list(percentiles)).unstack()
+        quantiles.columns = columns
+        return quantiles
+
+    def to_parquet_bytes(
+        self,
+        models: Optional[List[str]] = None,
+        statuses: Optional[List[Optional[bool]]] = None,
+        test_names: Optional[List[str]] = None
+    ) -> bytes:
+        """Single Parquet file of the history (optionally filtered as in table()), for download"""
+        buffer = io.BytesIO()
+        pq.write_table(self.table(models=models, statuses=statuses, test_names=test_names), buffer, compression="zstd")
+        return buffer.getvalue()
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import tempfile
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # Fall back to zlib when zstandard isn't installed
+    zstandard = None
+
+class BlobStore:
+    """
+    Content-addressed store for large texts (prompts and responses).
+
+    Each text is stored once, compressed, under blobs/<hash[:2]>/<hash>.zst
+    (or .zz when zstandard is unavailable), so identical prompts and
+    responses are deduplicated across runs.
+    """
+
+    def __init__(self, blob_dir: Path):
+        self.blob_dir = Path(blob_dir)
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.get = lru_cache(maxsize=256)(self._read)
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _path(self, blob_hash: str, suffix: str) -> Path:
+        return self.blob_dir / blob_hash[:2] / f"{blob_hash}{suffix}"
+
+    def put(self, text: str) -> str:
+        """Store text if not already present and return its hash"""
+        blob_hash = self.text_hash(text)
+        if self._path(blob_hash, ".zst").exists() or self._path(blob_hash, ".zz").exists():
+            return blob_hash
+
+        data = text.encode("utf-8")
+        if zstandard is not None:
+            path, payload = self._path(blob_hash, ".zst"), zstandard.ZstdCompressor(level=3).compress(data)
+        else:
+            path, payload = self._path(blob_hash, ".zz"), zlib.compress(data, 6)
+
+        # Write to a temp file and rename so readers never see a partial blob
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return blob_hash
+
+    def _read(self, blob_hash: str) -> str:
+        path = self._path(blob_hash, ".zst")
+        if path.exists():
+            if zstandard is None:
+                raise ImportError(f"Blob {blob_hash} is zstd-compressed; pip install zstandard to read it")
+            with open(path, 'rb') as f:
+                return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+        with open(self._path(blob_hash, ".zz"), 'rb') as f:
+            return zlib.decompress(f.read()).decode("utf-8")
@@ -1,37 +1,60 @@
 import json
 import os
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
 from src.core.models import TestCase, TestResult
+from src.storage.blobs import BlobStore
+from src.storage.locking import file_lock, atomic_write_json
+
+# Large text fields kept in the blob store; results hold only their hashes
+TEXT_FIELDS = ("prompt", "response")
+# The same for each entry of a conversation's turn_results
+TURN_TEXT_FIELDS = ("content", "response")
 
 class StorageManager:
     def __init__(self, data_dir: str = "data"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         self.test_cases_file = self.data_dir / "test_cases.json"
-        self.results_file = self.data_dir / "results.json"
+        # Results are append-only JSON lines so runs can be streamed without loading all history
+        self.results_file = self.data_dir / "results.jsonl"
+        self.blobs = BlobStore(self.data_dir / "blobs")
         
         # Initialize files if they don't exist
-        if not self.test_cases_file.exists():
-            self._save_json(self.test_cases_file, [])
-        if not self.results_file.exists():
-            self._save_json(self.results_file, [])
+        with file_lock(self.test_cases_file):
+            if not self.test_cases_file.exists():
+                self._save_json(self.test_cases_file, [])
+        with file_lock(self.results_file):
+            if not self.results_file.exists() or (self.data_dir / "results.json").exists():
+                self._migrate_legacy_results()
     
     def _save_json(self, filepath: Path, data: List):
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        # Atomic replace, so readers and crashed writers never leave a truncated file
+        atomic_write_json(filepath, data, indent=2, default=str)
     
     def _load_json(self, filepath: Path) -> List:
         with open(filepath, 'r') as f:
-            return json.load(f)
+            content = f.read()
+        return json.loads(content) if content.strip() else []
+
+    def _migrate_legacy_results(self):
+        """Append results.json (a single JSON array), if there is one, to results.jsonl"""
+        legacy_file = self.data_dir / "results.json"
+        legacy = self._load_json(legacy_file) if legacy_file.exists() else []
+        with open(self.results_file, 'a') as f:
+            for result in legacy:
+                f.write(json.dumps(result, default=str) + "\n")
+        if legacy_file.exists():
+            legacy_file.rename(legacy_file.with_suffix(".json.migrated"))
     
     # Test Cases
     def save_test_case(self, test_case: TestCase):
-        cases = self.get_all_test_cases()
-        # Remove existing case with same ID
-        cases = [c for c in cases if c.get('id') != test_case.id]
-        cases.append(test_case.model_dump())
-        self._save_json(self.test_cases_file, cases)
+        with file_lock(self.test_cases_file):
+            cases = self.get_all_test_cases()
+            # Remove existing case with same ID
+            cases = [c for c in cases if c.get('id') != test_case.id]
+            cases.append(test_case.model_dump())
+            self._save_json(self.test_cases_file, cases)
     
     def get_all_test_cases(self) -> List[dict]:
         return self._load_json(self.test_cases_file)
@@ -41,18 +64,114 @@ class StorageManager:
         return next((c for c in cases if c['id'] == test_id), None)
     
     def delete_test_case(self, test_id: str):
-        cases = [c for c in self.get_all_test_cases() if c['id'] != test_id]
-        self._save_json(self.test_cases_file, cases)
+        with file_lock(self.test_cases_file):
+            cases = [c for c in self.get_all_test_cases() if c['id'] != test_id]
+            self._save_json(self.test_cases_file, cases)
     
     # Results
     def save_result(self, result: TestResult):
-        results = self._load_json(self.results_file)
-        results.append(result.model_dump())
-        self._save_json(self.results_file, results)
+        self.save_results([result])
+
+    def save_results(self, results: List[TestResult]):
+        """Append results; safe to call from several processes at once"""
+        lines = []
+        for result in results:
+            record = result.model_dump()
+            record['response_length'] = len(result.response)
+            for field in TEXT_FIELDS:
+                record[f"{field}_hash"] = self.blobs.put(record.pop(field))
+            for turn in record['turn_results']:
+                for field in TURN_TEXT_FIELDS:
+                    turn[f"{field}_hash"] = self.blobs.put(turn.pop(field))
+            lines.append(json.dumps(record, default=str) + "\n")
+
+        # Blobs are written first, so a result line never references a missing blob
+        with file_lock(self.results_file):
+            with open(self.results_file, 'ab+') as f:
+                # Terminate a line left unfinished by a crashed writer instead of appending onto it
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        lines.insert(0, "\n")
+                f.write("".join(lines).encode("utf-8"))
+
+    def load_text(self, result: dict, field: str) -> str:
+        """
+        Fetch a stored result's prompt or response, or a stored turn's content or response
+        (inline in older results, otherwise from the blob store)
+        """
+        if field in result:
+            return result[field]
+        blob_hash = result.get(f"{field}_hash")
+        return self.blobs.get(blob_hash) if blob_hash else ""
+
+    def hydrate(self, result: dict) -> dict:
+        """Copy of a stored result with prompt and response (and each turn's text) loaded"""
+        hydrated = {**result, **{field: self.load_text(result, field) for field in TEXT_FIELDS}}
+        if result.get('turn_results'):
+            hydrated['turn_results'] = [self.hydrate_turn(turn) for turn in result['turn_results']]
+        return hydrated
+
+    def hydrate_turn(self, turn: dict) -> dict:
+        """Copy of a stored turn with its message and reply loaded"""
+        return {**turn, **{field: self.load_text(turn, field) for field in TURN_TEXT_FIELDS}}
+
+    def iter_results(self, run_ids: Optional[Set[str]] = None) -> Iterator[dict]:
+        """Stream stored results, optionally only those belonging to the given runs"""
+        # Cheap substring check so lines from other runs are never JSON-decoded
+        markers = [f'"run_id": "{run_id}"' for run_id in run_ids] if run_ids else None
+        with open(self.results_file, 'r') as f:
+            for line in f:
+                # Skip blank lines and a trailing line another process is still writing
+                if not line.strip() or not line.endswith("\n"):
+                    continue
+                if markers and not any(marker in line for marker in markers):
+                    continue
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Remains of an interrupted write
+                if run_ids is None or result.get('run_id') in run_ids:
+                    yield result
+
+    def iter_results_with_offsets(self, start: int = 0) -> Iterator[Tuple[int, int, dict]]:
+        """
+        Stream (start_offset, end_offset, result) from byte offset `start`.
+        A trailing line still being written is skipped, so callers can resume from the last end_offset.
+        """
+        with open(self.results_file, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                end = offset + len(line)
+                try:
+                    result = json.loads(line) if line.strip() else None
+                except json.JSONDecodeError:
+                    result = None  # Remains of an interrupted write
+                if result is not None:
+                    yield offset, end, result
+                offset = end
     
     def get_all_results(self) -> List[dict]:
-        return self._load_json(self.results_file)
+        return list(self.iter_results())
     
     def get_results_for_test(self, test_id: str) -> List[dict]:
-        results = self.get_all_results()
-        return [r for r in results if r['test_id'] == test_id]
\ No newline at end of file
+        return [r for r in self.iter_results() if r['test_id'] == test_id]
+
+    def get_results_for_run(self, run_id: str) -> List[dict]:
+        return list(self.iter_results({run_id}))
+
+    def list_runs(self) -> List[Dict]:
+        """Summaries of stored runs (newest first): run_id, started, results, passed"""
+        runs: Dict[str, Dict] = {}
+        for result in self.iter_results():
+            run_id = result.get('run_id')
+            if not run_id:
+                continue
+            run = runs.setdefault(run_id, {'run_id': run_id, 'started': result['timestamp'], 'results': 0, 'passed': 0})
+            run['started'] = min(run['started'], result['timestamp'])
+            run['results'] += 1
+            run['passed'] += result.get('passed') is True
+        return sorted(runs.values(), key=lambda r: r['started'], reverse=True)
@@ -0,0 +1,188 @@
+import json
+import threading
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+from src.storage.manager import StorageManager
+
+# Dictionary-encoded string columns: each row stores a small integer code
+STRING_COLUMNS = ("test_id", "test_name", "run_id", "provider", "model")
+
+# Codes for the status column
+PASSED, FAILED, MANUAL = 1, 0, -1
+
+class ResultIndex:
+    """
+    Compact in-memory index over results.jsonl for dashboards.
+
+    Holds one row per stored result in typed arrays: dictionary-encoded ids,
+    names, runs, providers and models, plus status, error flag, timestamp,
+    execution time and the byte range of the result's line (about 50 bytes a row,
+    so a million results fit in ~50 MB). Evaluation details are read from the
+    results file on demand with load(); prompt and response text via
+    StorageManager.load_text. refresh() indexes only results appended since the last call.
+
+    Readers take the same lock as refresh(), so a dashboard can refresh the index
+    from one thread while others read it. Numpy views over the arrays never outlive
+    the lock: an array with an exported buffer can't grow, so refresh() would fail.
+    """
+
+    def __init__(self, storage: StorageManager):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.end_offset = 0
+        self._values: Dict[str, List[Optional[str]]] = {name: [] for name in STRING_COLUMNS}
+        self._codes_by_value: Dict[str, Dict[Optional[str], int]] = {name: {} for name in STRING_COLUMNS}
+        self._codes = {name: array('i') for name in STRING_COLUMNS}
+        self._status = array('b')
+        self._error = array('b')
+        self._timestamp = array('d')
+        self._execution_time = array('d')
+        self._offset = array('q')
+        self._length = array('i')
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._status)
+
+    def refresh(self) -> int:
+        """Index results appended since the last refresh. Returns the number of new rows"""
+        with self._lock:
+            if self.storage.results_file.stat().st_size < self.end_offset:
+                self._reset()  # Results file was rewritten
+            added = 0
+            for start, end, result in self.storage.iter_results_with_offsets(self.end_offset):
+                self._append(start, end, result)
+                self.end_offset = end
+                added += 1
+            return added
+
+    def _append(self, start: int, end: int, result: Dict[str, Any]):
+        for name in STRING_COLUMNS:
+            value = result.get(name)
+            codes = self._codes_by_value[name]
+            if value not in codes:
+                codes[value] = len(self._values[name])
+                self._values[name].append(value)
+            self._codes[name].append(codes[value])
+        passed = result.get('passed')
+        self._status.append(PASSED if passed is True else FAILED if passed is False else MANUAL)
+        self._error.append(bool(result.get('error')))
+        self._timestamp.append(datetime.fromisoformat(str(result['timestamp'])).timestamp())
+        self._execution_time.append(result.get('execution_time') or 0.0)
+        self._offset.append(start)
+        self._length.append(end - start)
+
+    def distinct(self, column: str) -> List[str]:
+        """Values seen in a string column (e.g. all models)"""
+        with self._lock:
+            return [value for value in self._values[column] if value is not None]
+
+    def filter(
+        self,
+        statuses: Optional[Iterable[Optional[bool]]] = None,
+        test_names: Optional[Iterable[str]] = None,
+        models: Optional[Iterable[str]] = None,
+        run_ids: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """Row numbers matching every given condition (statuses are passed values: True, False, None), newest first"""
+        # Zero-copy views over the arrays, so filtering a million rows is vectorized
+        with self._lock:
+            return self._filter(statuses, test_names, models, run_ids)
+
+    def _filter(self, statuses, test_names, models, run_ids) -> np.ndarray:
+        mask = np.ones(len(self._status), dtype=bool)
+        if statuses is not None:
+            wanted = [PASSED if s is True else FAILED if s is False else MANUAL for s in statuses]
+            mask &= np.isin(np.frombuffer(self._status, dtype=np.int8), wanted)
+
+        for column, accepted in (("test_name", test_names), ("model", models), ("run_id", run_ids)):
+            if accepted is not None:
+                codes = self._codes_by_value[column]
+                wanted = [codes[value] for value in accepted if value in codes]
+                mask &= np.isin(np.frombuffer(self._codes[column], dtype=np.int32), wanted)
+
+        rows = np.flatnonzero(mask)
+        timestamps = np.frombuffer(self._timestamp, dtype=np.float64)[rows]
+        return rows[np.argsort(-timestamps, kind="stable")]
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """The indexed fields of row i"""
+        i = int(i)
+        with self._lock:
+            status = self._status[i]
+            return {
+                **{name: self._values[name][self._codes[name][i]] for name in STRING_COLUMNS},
+                'passed': True if status == PASSED else False if status == FAILED else None,
+                'has_error': bool(self._error[i]),
+                'timestamp': datetime.fromtimestamp(self._timestamp[i]),
+                'execution_time': self._execution_time[i]
+            }
+
+    def load(self, i: int) -> Dict[str, Any]:
+        """The full stored result for row i (text fields still as blob hashes)"""
+        i = int(i)
+        with self._lock:
+            offset, length = self._offset[i], self._length[i]
+        with open(self.storage.results_file, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def load_many(self, rows: Iterable[int]) -> Iterator[Dict[str, Any]]:
+        """Full stored results for several rows, read in file order through one handle"""
+        with self._lock:
+            spans = [(self._offset[i], self._length[i]) for i in sorted(int(i) for i in rows)]
+        with open(self.storage.results_file, 'rb') as f:
+            for offset, length in spans:
+                f.seek(offset)
+                yield json.loads(f.read(length))
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Same summaries as StorageManager.list_runs, without rereading the results file"""
+        with self._lock:
+            return self._runs()
+
+    def _runs(self) -> List[Dict[str, Any]]:
+        # Called with the lock held; the views are released when this returns
+        codes = np.frombuffer(self._codes["run_id"], dtype=np.int32)
+        timestamps = np.frombuffer(self._timestamp, dtype=np.float64)
+        passed = np.frombuffer(self._status, dtype=np.int8) == PASSED
+        n = len(self._values["run_id"])
+        results = np.bincount(codes, minlength=n)
+        passes = np.bincount(codes, weights=passed, minlength=n)
+        started = np.full(n, np.inf)
+        np.minimum.at(started, codes, timestamps)
+
+        runs = [
+            {
+                'run_id': run_id,
+                'started': datetime.fromtimestamp(started[code]).isoformat(),
+                'results': int(results[code]),
+                'passed': int(passes[code])
+            }
+            for code, run_id in enumerate(self._values["run_id"])
+            if run_id is not None
+        ]
+        return sorted(runs, key=lambda r: r['started'], reverse=True)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of passed, failed and manual-review results"""
+        with self._lock:
+            return {
+                'total': len(self._status),
+                'passed': self._status.count(PASSED),
+                'failed': self._status.count(FAILED),
+                'manual': self._status.count(MANUAL)
+            }
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the index's arrays and string tables"""
+        with self._lock:
+            arrays = [*self._codes.values(), self._status, self._error, self._timestamp,
+                      self._execution_time, self._offset, self._length]
+            size = sum(a.itemsize * len(a) for a in arrays)
+            return size + sum(len(value or "") + 50 for values in self._values.values() for value in values)
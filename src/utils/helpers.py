@@ -1,6 +1,13 @@
 from datetime import datetime
+from typing import Optional, Tuple
+import os
 import re
 
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
 def format_timestamp(timestamp_str: str) -> str:
     """Format ISO timestamp to readable string"""
     try:
@@ -25,4 +32,88 @@ def validate_regex(pattern: str) -> bool:
         re.compile(pattern)
         return True
     except re.error:
-        return False
\ No newline at end of file
+        return False
+
+def _regex_risk(items, in_repeat: bool = False) -> Optional[str]:
+    for op, av in items:
+        if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            _, max_repeat, sub = av
+            unbounded = max_repeat == sre_parse.MAXREPEAT
+            if unbounded and in_repeat:
+                return "nested unbounded quantifiers (e.g. (a+)+)"
+            risk = _regex_risk(sub, in_repeat or max_repeat > 1)
+            if risk:
+                return risk
+        elif op == sre_parse.SUBPATTERN:
+            risk = _regex_risk(av[-1], in_repeat)
+            if risk:
+                return risk
+        elif op == sre_parse.BRANCH:
+            branches = av[1]
+            # The parser factors out shared prefixes, so overlapping alternatives
+            # show up as an empty branch or as branches starting the same way
+            heads = [str(b[0]) for b in branches if b]
+            if in_repeat and (len(heads) != len(branches) or len(heads) != len(set(heads))):
+                return "overlapping alternatives inside a repeated group (e.g. (a|ab)*)"
+            for branch in branches:
+                risk = _regex_risk(branch, in_repeat)
+                if risk:
+                    return risk
+    return None
+
+def regex_risk(pattern: str) -> Optional[str]:
+    """
+    Flag patterns prone to catastrophic backtracking.
+    Returns a short reason, or None if the pattern looks safe (or doesn't compile).
+    """
+    try:
+        return _regex_risk(sre_parse.parse(pattern))
+    except Exception:
+        return None
+
+def regex_search(pattern: str, text: str, timeout: Optional[float] = None, engine: Optional[str] = None):
+    """
+    re.search with a time budget. Raises TimeoutError when the budget is exceeded.
+
+    REGEX_ENGINE selects the engine: "regex" (default, backtracking with timeout)
+    or "re2" (linear time, no timeout needed; requires google-re2).
+    """
+    engine = engine or os.getenv("REGEX_ENGINE", "regex")
+    if engine == "re2":
+        import re2
+        return re2.search(pattern, text)
+    import regex
+    return regex.search(pattern, text, timeout=timeout, concurrent=True)
+
+# USD per million (input, output) tokens, matched by model name prefix
+MODEL_PRICING = {
+    "claude-opus-4": (15.0, 75.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "claude-3-haiku": (0.25, 1.25),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4": (30.0, 60.0),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+def estimate_cost(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    default_pricing: Optional[Tuple[float, float]] = None
+) -> float:
+    """Estimate the USD cost of a call; unknown models are priced at `default_pricing`, or cost 0.0 without it"""
+    input_price, output_price = default_pricing or (0.0, 0.0)
+    for prefix, pricing in MODEL_PRICING.items():
+        if model.startswith(prefix):
+            input_price, output_price = pricing
+            break
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
@@ -0,0 +1,90 @@
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+import pytest
+
+# Make `src` importable when running `pytest tests/` from a checkout
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core import models
+from src.core import runner as runner_module
+
+# Timestamp of results built with make_result (offset by their `minutes`)
+START = datetime(2026, 1, 1)
+
+class FakeProvider:
+    """
+    Provider stand-in for tests: records each call as {'content', 'json_schema', 'streamed'}
+    and replies without network access.
+
+    `reply` is a fixed reply, or a callable taking (messages, json_schema). By default
+    the last message is echoed as "reply to <message>", or as {"reply": <message>} when
+    structured output is requested. `errors` are raised by the first calls, one each.
+    With on_first_token (a streamed call), the first token arrives after `ttft` seconds
+    and the reply completes `generation` seconds later; otherwise it takes `delay` seconds.
+    """
+
+    def __init__(self, reply=None, errors=(), delay=0.0, ttft=0.0, generation=0.0, api_key="key-fake"):
+        self.reply = reply
+        self.errors = list(errors)
+        self.delay = delay
+        self.ttft = ttft
+        self.generation = generation
+        self.api_key = api_key
+        self.calls = []
+
+    def generate(self, prompt=None, **kwargs):
+        return self.chat([{"role": "user", "content": prompt}], **kwargs)
+
+    def chat(self, messages, json_schema=None, on_first_token=None, **kwargs):
+        content = messages[-1]["content"]
+        self.calls.append({'content': content, 'json_schema': json_schema, 'streamed': on_first_token is not None})
+        if self.errors:
+            raise self.errors.pop(0)
+        if on_first_token:
+            time.sleep(self.ttft)
+            on_first_token()
+            time.sleep(self.generation)
+        else:
+            time.sleep(self.delay)
+        if callable(self.reply):
+            return self.reply(messages, json_schema)
+        if self.reply is not None:
+            return self.reply
+        if json_schema is not None:
+            return json.dumps({"reply": content})
+        return f"reply to {content}"
+
+@pytest.fixture
+def fake_provider():
+    """The FakeProvider class, to build (or subclass) fakes with"""
+    return FakeProvider
+
+@pytest.fixture
+def make_runner(tmp_path):
+    """TestRunner whose Claude provider is a fake (a FakeProvider() unless given)"""
+    def make(provider=None):
+        test_runner = runner_module.TestRunner(str(tmp_path / "token_cache.json"))
+        test_runner.providers['claude'] = provider or FakeProvider()
+        return test_runner
+    return make
+
+@pytest.fixture
+def make_test_cases():
+    """n test cases with ids "0".."n-1" and names "t0".."t<n-1>", sharing `fields`"""
+    def make(n, **fields):
+        return [models.TestCase(**{'id': str(i), 'name': f"t{i}", 'prompt': "p", **fields}) for i in range(n)]
+    return make
+
+@pytest.fixture
+def make_result():
+    """A stored-result TestResult for `test_name`, timestamped `minutes` after START"""
+    def make(test_name, model="m1", passed=True, run_id="run", minutes=0, **fields):
+        return models.TestResult(**{
+            'test_id': test_name, 'test_name': test_name, 'prompt': "p", 'response': "r",
+            'provider': "claude", 'model': model, 'passed': passed, 'execution_time': 1.0,
+            'run_id': run_id, 'timestamp': START + timedelta(minutes=minutes), **fields
+        })
+    return make
@@ -0,0 +1,29 @@
+import io
+import pyarrow.parquet as pq
+from src.storage.analytics import ResultsAnalytics
+from src.storage.manager import StorageManager
+
+def test_latency_percentiles_on_empty_dataset(tmp_path):
+    analytics = ResultsAnalytics(StorageManager(str(tmp_path)))
+    percentiles = analytics.latency_percentiles_by_model()
+    assert percentiles.empty
+    assert list(percentiles.columns) == ["p50", "p90", "p95", "p99"]
+
+def test_latency_percentiles_with_no_matching_model(tmp_path, make_result):
+    storage = StorageManager(str(tmp_path))
+    storage.save_results([make_result("a", "m1", True)])
+    percentiles = ResultsAnalytics(storage).latency_percentiles_by_model(models=["other"])
+    assert percentiles.empty
+    assert list(percentiles.columns) == ["p50", "p90", "p95", "p99"]
+
+def test_export_honors_status_and_test_filters(tmp_path, make_result):
+    storage = StorageManager(str(tmp_path))
+    storage.save_results([
+        make_result("a", "m1", True), make_result("b", "m1", False), make_result("c", "m1", None), make_result("a", "m2", False)
+    ])
+    analytics = ResultsAnalytics(storage)
+    table = pq.read_table(io.BytesIO(analytics.to_parquet_bytes(models=["m1"], statuses=[False, None])))
+    assert sorted(table["test_name"].to_pylist()) == ["b", "c"]
+    table = pq.read_table(io.BytesIO(analytics.to_parquet_bytes(statuses=[False], test_names=["a"])))
+    assert table["model"].to_pylist() == ["m2"]
+    assert analytics.table(statuses=[]).num_rows == 0
@@ -0,0 +1,34 @@
+import pytest
+from src.storage import blobs
+from src.storage.blobs import BlobStore
+from src.storage.manager import StorageManager
+
+def test_round_trip_and_dedup(tmp_path):
+    store = BlobStore(tmp_path)
+    text = "réponse\n" * 1000
+    blob_hash = store.put(text)
+    assert store.put(text) == blob_hash == BlobStore.text_hash(text)
+    assert len([path for path in tmp_path.rglob("*") if path.is_file()]) == 1
+    assert BlobStore(tmp_path).get(blob_hash) == text
+    assert store.get(store.put("")) == ""
+
+def test_zlib_fallback_without_zstandard(tmp_path, monkeypatch):
+    store = BlobStore(tmp_path)
+    zstd_hash = store.put("compressed with zstd") if blobs.zstandard else None
+    monkeypatch.setattr(blobs, "zstandard", None)
+    store = BlobStore(tmp_path)
+    blob_hash = store.put("compressed with zlib")
+    assert store._path(blob_hash, ".zz").exists()
+    assert store.get(blob_hash) == "compressed with zlib"
+    if zstd_hash:
+        with pytest.raises(ImportError, match="pip install zstandard"):
+            store.get(zstd_hash)
+
+def test_identical_texts_are_stored_once_across_results(tmp_path, make_result):
+    storage = StorageManager(str(tmp_path))
+    storage.save_results([make_result("a", run_id="r1"), make_result("a", run_id="r2")])
+    first, second = storage.iter_results()
+    assert 'response' not in first and first['response_hash'] == second['response_hash']
+    assert storage.load_text(second, 'response') == "r"
+    # One blob for the prompt and one for the response
+    assert len([path for path in storage.blobs.blob_dir.rglob("*") if path.is_file()]) == 2
@@ -0,0 +1,131 @@
+import threading
+import time
+import pytest
+from src.core import models
+from src.core.budget import BudgetExceeded, RunBudget, charge
+from src.core.work_queue import QueueBudget, WorkQueue
+from src.utils.helpers import MODEL_PRICING
+
+def test_concurrent_reservations_never_exceed_limit():
+    budget = RunBudget(limit=3.5)
+    in_flight, peak, refused = [0], [0], []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            budget.reserve(1.0)
+        except BudgetExceeded:
+            refused.append(1)
+            return
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        budget.settle(1.0, 1.0)
+
+    threads = [threading.Thread(target=call) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= 3
+    assert budget.spent == 3.0
+    assert len(refused) == 7
+    assert budget.stopped and budget.reserved == 0
+
+def test_waiting_reservation_fits_once_calls_settle_cheaper():
+    budget = RunBudget(limit=1.0)
+    budget.reserve(0.8)
+    reserved = threading.Event()
+
+    def call():
+        budget.reserve(0.5)
+        reserved.set()
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    assert not reserved.wait(0.05)
+    budget.settle(0.8, 0.2)
+    thread.join()
+    assert reserved.is_set() and not budget.stopped
+
+def test_unknown_models_are_charged_at_highest_prices():
+    assert charge("some-local-model", 1000, 1000) >= max(charge(model, 1000, 1000) for model in MODEL_PRICING) > 0
+
+@pytest.fixture
+def counting_provider(fake_provider):
+    class CountingProvider(fake_provider):
+        """Counts every prompt as 10k tokens"""
+        counted = 0
+
+        def count_tokens(self, messages, model, system_prompt=None):
+            self.counted += 1
+            return 10_000
+
+    return CountingProvider(reply="ok")
+
+def test_reservation_is_priced_from_counted_tokens(tmp_path, make_runner, counting_provider):
+    runner = make_runner(counting_provider)
+    reservations = []
+
+    class RecordingBudget(RunBudget):
+        def reserve(self, cost):
+            reservations.append(cost)
+            super().reserve(cost)
+
+    test_case = models.TestCase(id="a", name="a", prompt="hi", model="claude-sonnet-4-20250514", max_tokens=100)
+    runner.run_tests([test_case], budget=RecordingBudget(limit=10.0))
+    assert reservations == [pytest.approx(charge(test_case.model, 10_000, 100))]
+    assert (tmp_path / "token_cache.json").exists()
+
+def test_uncapped_budget_only_estimates_tokens(make_runner, counting_provider):
+    runner = make_runner(counting_provider)
+    budget = RunBudget()
+    runner.run_tests([models.TestCase(id="a", name="a", prompt="hi", model="claude-sonnet-4-20250514")], budget=budget)
+    assert counting_provider.counted == 0
+    assert budget.spent > 0
+
+def test_queue_budget_is_shared_across_workers(tmp_path, make_test_cases):
+    queue = WorkQueue(str(tmp_path / "q.db"))
+    queue.submit_run("run", make_test_cases(2), shard_size=1, max_cost=1.0)
+    budgets = []
+    for worker in ("w1", "w2"):
+        (task_id, _, _), = queue.claim(worker)
+        assert queue.start(task_id, worker)
+        budgets.append(QueueBudget(queue, "run", task_id, worker, poll_interval=0.01))
+
+    assert budgets[0].capped
+    budgets[0].reserve(0.6)
+    # The second call would only fit once the first settles
+    waiter = threading.Thread(target=budgets[1].reserve, args=(0.5,))
+    waiter.start()
+    time.sleep(0.05)
+    assert waiter.is_alive()
+    budgets[0].settle(0.6, 0.5)
+    waiter.join()
+
+    with pytest.raises(BudgetExceeded):
+        budgets[0].reserve(0.6)
+    assert queue.run_spend("run") == {'max_cost': 1.0, 'spent': 0.5, 'stopped': True}
+    with pytest.raises(BudgetExceeded):
+        budgets[1].reserve(0.01)
+
+def test_expired_lease_releases_reservation(tmp_path, make_test_cases):
+    queue = WorkQueue(str(tmp_path / "q.db"), lease_timeout=0.05)
+    queue.submit_run("run", make_test_cases(2), max_cost=1.0)
+    (first, _, _), (second, _, _) = queue.claim("w1")
+    assert queue.start(first, "w1")
+    QueueBudget(queue, "run", first, "w1").reserve(0.9)
+    time.sleep(0.1)
+    # The first worker crashed without settling; its reservation lapses with the lease
+    queue.claim("w2")
+    assert queue.start(second, "w2")
+    QueueBudget(queue, "run", second, "w2", poll_interval=0.01).reserve(0.9)
+
+def test_queue_budget_without_cap_is_uncapped(tmp_path, make_test_cases):
+    queue = WorkQueue(str(tmp_path / "q.db"))
+    queue.submit_run("run", make_test_cases(1))
+    (task_id, _, _), = queue.claim("w1")
+    assert not QueueBudget(queue, "run", task_id, "w1").capped
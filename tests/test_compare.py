@@ -0,0 +1,46 @@
+from src.core.compare import compare_runs
+from src.storage.manager import StorageManager
+
+def _compare(tmp_path, base, head, **kwargs):
+    storage = StorageManager(str(tmp_path))
+    storage.save_results(base + head)
+    return compare_runs(storage.iter_results({"base", "head"}), "base", "head", load_text=storage.load_text, **kwargs)
+
+def test_flips_and_slowdowns(tmp_path, make_result):
+    comparison = _compare(tmp_path, [
+        make_result("breaks", run_id="base"),
+        make_result("fixed", passed=False, run_id="base"),
+        make_result("slow", run_id="base"),
+        make_result("jitter", run_id="base"),
+        make_result("dropped", run_id="base"),
+    ], [
+        make_result("breaks", passed=False, run_id="head"),
+        make_result("fixed", run_id="head"),
+        make_result("slow", run_id="head", execution_time=3.0),
+        # Slower by half a second or less is noise
+        make_result("jitter", run_id="head", execution_time=1.4),
+        make_result("errored", run_id="head"),
+    ])
+    assert {key: comparison[key] for key in ("compared", "added", "removed", "fixed", "newly_failing", "slower")} == {
+        'compared': 4, 'added': 1, 'removed': 1, 'fixed': 1, 'newly_failing': 1, 'slower': 1
+    }
+    assert [(r['test_id'], r['kinds']) for r in comparison['regressions']] == [("breaks", ["newly_failing"]), ("slow", ["slower"])]
+    assert comparison['regressions'][1]['latency_delta'] == 2.0
+
+def test_errors_count_as_failures(tmp_path, make_result):
+    comparison = _compare(tmp_path, [make_result("a", run_id="base")], [make_result("a", run_id="head", error="timeout")])
+    regression, = comparison['regressions']
+    assert regression['head_passed'] is False and regression['error'] == "timeout"
+
+def test_diffs_are_loaded_from_blobs(tmp_path, make_result):
+    comparison = _compare(tmp_path, [
+        make_result("changed", run_id="base", response="one\ntwo"),
+        make_result("same", run_id="base", response="same"),
+    ], [
+        make_result("changed", passed=False, run_id="head", response="one\nthree"),
+        make_result("same", passed=False, run_id="head", response="same"),
+    ])
+    diffs = {r['test_id']: r['diff'] for r in comparison['regressions']}
+    assert diffs['same'] == ""
+    assert "-two" in diffs['changed'] and "+three" in diffs['changed']
+    assert "--- run base" in diffs['changed']
@@ -0,0 +1,59 @@
+from src.core import models
+from src.storage.manager import StorageManager
+
+def _conversation(id, follow_up, **kwargs):
+    return models.TestCase(
+        id=id, name=id, prompt="hello",
+        expectations=[models.Expectation(type="contains", value="hello")],
+        turns=[models.Turn(content=follow_up, expectations=[models.Expectation(type="contains", value=follow_up)])],
+        **kwargs
+    )
+
+def test_shared_prefix_is_generated_once(make_runner):
+    runner = make_runner()
+    results = runner.run_tests([_conversation("a", "one"), _conversation("b", "two")])
+    assert [call['content'] for call in runner.providers['claude'].calls].count("hello") == 1
+    assert all(result.passed for result in results)
+    assert results[0].turn_results[0]['shared']
+
+def test_structured_output_schema_applies_only_to_turns_that_check_json(make_runner):
+    runner = make_runner()
+    test_case = models.TestCase(
+        id="a", name="a", prompt="hello", structured_output=True,
+        expectations=[models.Expectation(type="json_valid", value="")],
+        turns=[models.Turn(content="now in prose", expectations=[models.Expectation(type="contains", value="prose")])]
+    )
+    result, = runner.run_tests([test_case])
+    assert [(call['content'], call['json_schema']) for call in runner.providers['claude'].calls] == [
+        ("hello", {"type": "object"}), ("now in prose", None)
+    ]
+    assert result.passed
+
+def test_turns_with_different_schemas_are_not_shared(make_runner):
+    runner = make_runner()
+    plain = _conversation("a", "one")
+    structured = _conversation("b", "one", structured_output=True)
+    structured.expectations = [models.Expectation(type="json_valid", value="")]
+    runner.run_tests([plain, structured])
+    assert [call['content'] for call in runner.providers['claude'].calls].count("hello") == 2
+
+def test_turn_text_is_stored_in_blob_store(tmp_path, make_runner):
+    storage = StorageManager(str(tmp_path))
+    runner = make_runner()
+    test_case = _conversation("a", "one")
+    storage.save_results(runner.run_tests([test_case], run_id="r1"))
+
+    line = storage.results_file.read_text()
+    assert "reply to one" not in line
+    stored, = storage.iter_results()
+    assert set(stored['turn_results'][0]) >= {'content_hash', 'response_hash'}
+    assert 'response' not in stored['turn_results'][0]
+
+    hydrated = storage.hydrate(stored)
+    assert [turn['response'] for turn in hydrated['turn_results']] == ["reply to hello", "reply to one"]
+
+    # Stored conversations can be re-checked against changed expectations without the model
+    test_case.turns[0].expectations = [models.Expectation(type="contains", value="nothing like it")]
+    result, = runner.reevaluate([test_case], [hydrated], [storage.load_text(stored, 'response')], run_id="r2")
+    assert result.passed is False
+    assert len(runner.providers['claude'].calls) == 2
@@ -0,0 +1,32 @@
+from src.core.evaluator import Evaluator
+from src.core.models import Expectation, EvaluationType
+
+def test_length_values_saved_as_text_are_compared_as_numbers():
+    passed, results = Evaluator.evaluate("hello world", [Expectation(type=EvaluationType.LENGTH_MIN, value="5")])
+    assert passed is True
+    assert results[0]['details'] == "Min length: 5, Actual: 11"
+
+def test_malformed_expectation_fails_only_its_own_check():
+    outputs = Evaluator.evaluate_batch([
+        ("hello", [
+            Expectation(type=EvaluationType.LENGTH_MAX, value="not a number"),
+            Expectation(type=EvaluationType.CONTAINS, value="hello")
+        ]),
+        ("world", [Expectation(type=EvaluationType.CONTAINS, value="world")])
+    ])
+    (passed, results), (other_passed, _) = outputs
+    assert passed is False
+    assert results[0]['status'] == "error"
+    assert "ValueError" in results[0]['error']
+    assert results[1]['passed'] is True
+    assert other_passed is True
+
+def test_semantic_and_judge_values_accept_json_text():
+    assert Evaluator.semantic_params('{"reference": "Paris", "threshold": 0.9}') == ("Paris", 0.9)
+    assert Evaluator.semantic_params("Paris") == ("Paris", 0.8)
+    assert Evaluator.judge_rubric('{"rubric": "Be polite"}') == "Be polite"
+
+def test_semantic_value_missing_reference_is_an_evaluation_error():
+    passed, results = Evaluator.evaluate("Paris", [Expectation(type=EvaluationType.SEMANTIC_SIMILARITY, value='{"threshold": 0.5}')])
+    assert passed is False
+    assert results[0]['status'] == "error"
@@ -0,0 +1,92 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from src.core import models
+from src.core.jobs import JobManager
+from src.storage.manager import StorageManager
+
+def _manager(storage, runner, chunk_size=1):
+    manager = JobManager(storage, chunk_size=chunk_size, heartbeat_interval=0.05)
+    manager.runner = runner
+    return manager
+
+def _wait_for(manager, job_id, *statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} stayed {manager.get(job_id)['status']}")
+
+def _write_job(storage, job_id, **fields):
+    (storage.data_dir / "jobs").mkdir(parents=True, exist_ok=True)
+    job = {'job_id': job_id, 'status': "running", **fields}
+    (storage.data_dir / "jobs" / f"{job_id}.json").write_text(json.dumps(job))
+
+def test_only_jobs_whose_owner_is_gone_are_interrupted(tmp_path):
+    storage = StorageManager(str(tmp_path))
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    live = {'host': socket.gethostname(), 'pid': os.getpid(), 'instance': "other"}
+    _write_job(storage, "legacy")
+    _write_job(storage, "dead-pid", owner={**live, 'pid': exited.pid}, heartbeat=time.time())
+    _write_job(storage, "stale", owner=live, heartbeat=time.time() - 120)
+    _write_job(storage, "live", owner=live, heartbeat=time.time())
+
+    manager = JobManager(storage)
+    try:
+        statuses = {job['job_id']: job['status'] for job in manager.list_jobs()}
+    finally:
+        manager.shutdown()
+    assert statuses == {'legacy': "interrupted", 'dead-pid': "interrupted", 'stale': "interrupted", 'live': "running"}
+
+def test_second_manager_keeps_and_can_cancel_running_job(tmp_path, make_runner, fake_provider, make_test_cases):
+    storage = StorageManager(str(tmp_path))
+    owner = _manager(storage, make_runner(fake_provider(reply="ok", delay=0.05)))
+    try:
+        job_id = owner.submit(make_test_cases(50), prioritized=False, max_workers=1)
+        _wait_for(owner, job_id, "running")
+        # E.g. the UI's cached manager was cleared while the job kept running
+        other = _manager(storage, make_runner(fake_provider(reply="ok", delay=0.05)))
+        try:
+            assert other.get(job_id)['status'] == "running"
+            assert other.cancel(job_id)
+            job = _wait_for(other, job_id, "cancelled")
+        finally:
+            other.shutdown()
+    finally:
+        owner.shutdown()
+    assert 0 < job['done'] < 50
+    assert not (storage.data_dir / "jobs" / f"{job_id}.cancel").exists()
+
+def test_cancel_in_owning_process(tmp_path, make_runner, fake_provider, make_test_cases):
+    storage = StorageManager(str(tmp_path))
+    manager = _manager(storage, make_runner(fake_provider(reply="ok", delay=0.05)))
+    try:
+        job_id = manager.submit(make_test_cases(50), prioritized=False, max_workers=1)
+        _wait_for(manager, job_id, "running")
+        assert manager.cancel(job_id)
+        job = _wait_for(manager, job_id, "cancelled")
+        assert not manager.cancel(job_id)
+    finally:
+        manager.shutdown()
+    assert job['done'] < 50
+    assert len(list(storage.iter_results())) == job['done']
+
+def test_fail_fast_stops_across_chunks(tmp_path, make_runner, fake_provider, make_test_cases):
+    storage = StorageManager(str(tmp_path))
+    manager = _manager(storage, make_runner(fake_provider(reply="ok", delay=0.05)), chunk_size=2)
+    failing = make_test_cases(6, expectations=[models.Expectation(type="contains", value="missing")])
+    try:
+        job_id = manager.submit(failing, prioritized=False, fail_fast=2, max_workers=1)
+        job = _wait_for(manager, job_id, "completed", "failed")
+    finally:
+        manager.shutdown()
+    # The second failure ends the first chunk, so no later chunk is started
+    assert len(manager.runner.providers['claude'].calls) == 2
+    assert job['failed'] == 2
+    assert job['message'] == "Stopped after 2 failure(s); 4 test(s) not run"
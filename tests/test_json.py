@@ -0,0 +1,64 @@
+import json
+from types import SimpleNamespace
+from src.api.providers.claude import ClaudeProvider
+from src.core.evaluator import Evaluator
+from src.core.models import Expectation, EvaluationType
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"items": {"type": "array", "items": {"type": "object", "required": ["name"]}}},
+    "required": ["items", "total"]
+}
+
+def test_schema_errors_are_reported_per_field():
+    response = json.dumps({"items": [{"name": "a"}, {}]})
+    passed, (result,) = Evaluator.evaluate(response, [Expectation(type=EvaluationType.JSON_SCHEMA, value=SCHEMA)])
+    assert not passed
+    assert result['field_errors'] == [
+        {'path': "$", 'message': "'total' is a required property"},
+        {'path': "$.items[1]", 'message': "'name' is a required property"},
+    ]
+    assert result['details'] == "$: 'total' is a required property; $.items[1]: 'name' is a required property"
+
+def test_fenced_json_is_parsed_once_for_every_check():
+    response = '```json\n{"items": [], "total": 0}\n```'
+    passed, results = Evaluator.evaluate(response, [
+        Expectation(type=EvaluationType.JSON_VALID, value=True),
+        Expectation(type=EvaluationType.JSON_SCHEMA, value=json.dumps(SCHEMA)),
+    ])
+    assert passed
+    assert [result['details'] for result in results] == ["Valid JSON", "Matches schema"]
+
+def test_invalid_json_and_invalid_schema():
+    passed, (result,) = Evaluator.evaluate("{not json", [Expectation(type=EvaluationType.JSON_VALID, value=True)])
+    assert not passed and result['details'].startswith("Invalid JSON")
+    passed, (result,) = Evaluator.evaluate("{}", [Expectation(type=EvaluationType.JSON_SCHEMA, value={"type": 5})])
+    assert not passed and result['status'] == "error"
+    assert result['details'].startswith("Invalid schema")
+
+class FakeMessages:
+    def __init__(self, tool_input):
+        self.tool_input = tool_input
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(content=[SimpleNamespace(type="tool_use", input=self.tool_input)])
+
+def _claude(tool_input):
+    provider = ClaudeProvider(api_key="key-fake")
+    provider.client = SimpleNamespace(messages=FakeMessages(tool_input))
+    return provider
+
+def test_claude_wraps_non_object_schemas():
+    provider = _claude({"value": ["a", "b"]})
+    schema = {"type": "array", "items": {"type": "string"}}
+    assert json.loads(provider.generate("p", json_schema=schema)) == ["a", "b"]
+    call, = provider.client.messages.calls
+    assert call['tools'][0]['input_schema'] == {"type": "object", "properties": {"value": schema}, "required": ["value"]}
+    assert call['tool_choice'] == {"type": "tool", "name": "respond"}
+
+def test_claude_passes_object_schemas_through():
+    provider = _claude({"items": [], "total": 0})
+    assert json.loads(provider.generate("p", json_schema=SCHEMA)) == {"items": [], "total": 0}
+    assert provider.client.messages.calls[0]['tools'][0]['input_schema'] == SCHEMA
@@ -0,0 +1,68 @@
+import json
+import threading
+import pytest
+from src.core import models
+from src.core.evaluator import Evaluator
+from src.core.judge import Judge
+
+VERDICT = json.dumps({"passed": True, "reason": "ok"})
+
+@pytest.fixture
+def make_judge(tmp_path, fake_provider):
+    """Judge caching in tmp_path whose grading provider is a FakeProvider(**kwargs)"""
+    def make(**kwargs):
+        judge = Judge(provider_name="claude", model="claude-sonnet-4-20250514", cache_file=str(tmp_path / "judge_cache.json"))
+        judge._provider = fake_provider(**{'reply': VERDICT, **kwargs})
+        return judge
+    return make
+
+def test_verdicts_are_cached_across_instances(make_judge):
+    judge = make_judge()
+    first, = judge.grade_batch([("polite", "hello")])
+    assert first['passed'] and not first['cached'] and first['cost'] > 0
+    again, other = judge.grade_batch([("polite", "hello"), ("polite", "bye")])
+    assert again == {'passed': True, 'reason': "ok", 'latency': 0.0, 'cost': 0.0, 'cached': True}
+    assert not other['cached']
+    assert len(judge._provider.calls) == 2
+
+    reloaded = make_judge()
+    assert all(verdict['cached'] for verdict in reloaded.grade_batch([("polite", "hello"), ("polite", "bye")]))
+    assert reloaded._provider.calls == []
+
+def test_failed_gradings_are_not_cached(make_judge):
+    judge = make_judge(errors=[RuntimeError("overloaded")])
+    failed, = judge.grade_batch([("polite", "hello")])
+    assert failed['error'] == "overloaded" and not failed['passed']
+    retried, = judge.grade_batch([("polite", "hello")])
+    assert retried['passed'] and not retried['cached']
+
+def test_concurrent_batches_share_the_cache(make_judge):
+    judge = make_judge(delay=0.01)
+    verdicts, errors = [], []
+
+    def grade(batch):
+        try:
+            verdicts.extend(judge.grade_batch([("polite", f"reply {batch}-{i}") for i in range(5)]))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=grade, args=(batch,)) for batch in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == [] and len(verdicts) == 40
+    assert all(verdict['cached'] for verdict in make_judge().grade_batch([("polite", f"reply 7-{i}") for i in range(5)]))
+    assert len(json.loads(judge.cache_file.read_text())) == 40
+
+def test_judge_time_and_cost_are_kept_apart(make_judge, make_runner, monkeypatch):
+    monkeypatch.setattr(Evaluator, "_judge", make_judge(delay=0.2))
+    runner = make_runner()
+    test_case = models.TestCase(
+        id="a", name="a", prompt="p", expectations=[models.Expectation(type="judge", value="is a reply")]
+    )
+    result, = runner.run_tests([test_case])
+    assert result.passed
+    assert result.judge_time >= 0.2 > result.execution_time
+    assert result.judge_cost > 0
+    assert result.evaluation_results[0]['judge_cached'] is False
@@ -0,0 +1,53 @@
+import json
+import threading
+import pytest
+from src.core import models
+from src.storage.locking import atomic_write_json, file_lock
+from src.storage.manager import StorageManager
+
+def test_atomic_write_replaces_file(tmp_path):
+    path = tmp_path / "data.json"
+    atomic_write_json(path, {'a': 1})
+    atomic_write_json(path, {'a': 2}, indent=2)
+    assert json.loads(path.read_text()) == {'a': 2}
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+def test_failed_atomic_write_keeps_original_and_no_temp_file(tmp_path):
+    path = tmp_path / "data.json"
+    atomic_write_json(path, {'a': 1})
+    with pytest.raises(TypeError):
+        atomic_write_json(path, {'a': object()})
+    assert json.loads(path.read_text()) == {'a': 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+def test_file_lock_serializes_read_modify_write(tmp_path):
+    path = tmp_path / "counter.json"
+    atomic_write_json(path, 0)
+
+    def increment():
+        for _ in range(50):
+            with file_lock(path):
+                atomic_write_json(path, json.loads(path.read_text()) + 1)
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert json.loads(path.read_text()) == 200
+
+def test_concurrent_appends_lose_no_results(tmp_path):
+    def save(worker):
+        storage = StorageManager(str(tmp_path))
+        for i in range(25):
+            storage.save_result(models.TestResult(
+                test_id=f"{worker}-{i}", test_name="t", prompt="p", response="r",
+                provider="claude", model="m", execution_time=0.1
+            ))
+
+    threads = [threading.Thread(target=save, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({r['test_id'] for r in StorageManager(str(tmp_path)).iter_results()}) == 100
@@ -0,0 +1,108 @@
+import threading
+import time
+import pytest
+from src.api.client import ProviderPool, create_provider
+from src.core import runner
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {'headers': {'retry-after': retry_after} if retry_after else {}})()
+
+@pytest.fixture
+def key(fake_provider):
+    """A pooled key replying with its name, rate limited for its first `fail` calls"""
+    def make(name, fail=0, retry_after=None):
+        return fake_provider(reply=name, api_key=f"key-{name}", errors=[RateLimited(retry_after) for _ in range(fail)])
+    return make
+
+def test_round_robin_rotates_keys(key):
+    pool = ProviderPool([key("a"), key("b"), key("c")], strategy="round_robin")
+    assert [pool.generate(prompt="p") for _ in range(4)] == ["a", "b", "c", "a"]
+
+def test_rate_limited_key_is_benched_and_call_retried(key):
+    a, b = key("a", fail=1), key("b")
+    pool = ProviderPool([a, b], strategy="round_robin", cooldown=30.0)
+    assert pool.generate(prompt="p") == "b"
+    # "a" is cooling down, so every call goes to "b"
+    assert [pool.generate(prompt="p") for _ in range(3)] == ["b", "b", "b"]
+    stats = {s['key']: s for s in pool.stats()}
+    assert stats["...ey-a"]['throttled'] == 1
+    assert not stats["...ey-a"]['healthy']
+    assert stats["...ey-a"]['cooling_for'] > 25
+
+def test_cooldown_doubles_and_honors_retry_after(key):
+    pool = ProviderPool([key("a", fail=2), key("b")], strategy="round_robin", cooldown=10.0)
+    pool.generate(prompt="p")
+    assert 9 < pool.members[0].cooling_until - time.time() <= 10
+    pool.members[0].cooling_until = 0.0
+    pool.generate(prompt="p")
+    assert 19 < pool.members[0].cooling_until - time.time() <= 20
+
+    pool = ProviderPool([key("c", fail=1, retry_after="120"), key("d")], strategy="round_robin", cooldown=1.0)
+    pool.generate(prompt="p")
+    assert pool.members[0].cooling_until - time.time() > 100
+
+def test_cooled_down_key_returns_to_rotation(key):
+    a = key("a", fail=1)
+    pool = ProviderPool([a, key("b")], strategy="round_robin", cooldown=0.05)
+    pool.generate(prompt="p")
+    time.sleep(0.1)
+    assert "a" in [pool.generate(prompt="p") for _ in range(2)]
+
+def test_other_errors_are_raised_without_failover(key, fake_provider):
+    pool = ProviderPool([fake_provider(errors=[ValueError("bad request")]), key("b")], strategy="round_robin")
+    with pytest.raises(ValueError):
+        pool.generate(prompt="p")
+    assert pool.members[0].errors == 1
+
+def test_least_loaded_prefers_idle_key(key):
+    pool = ProviderPool([key("a"), key("b")])
+    pool.members[0].in_flight = 3
+    assert pool.generate(prompt="p") == "b"
+
+def test_single_pooled_key_builds_plain_provider(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    monkeypatch.setenv("ANTHROPIC_API_KEYS", "sk-only")
+    monkeypatch.setenv("ANTHROPIC_BASE_URLS", "https://gateway.example.com")
+    provider = create_provider("claude")
+    assert not isinstance(provider, ProviderPool)
+    assert provider.api_key == "sk-only"
+    assert provider.base_url == "https://gateway.example.com"
+
+def test_runner_builds_one_provider_under_concurrency(monkeypatch):
+    created = []
+
+    def slow_create(name):
+        time.sleep(0.05)
+        created.append(name)
+        return object()
+
+    monkeypatch.setattr(runner, "create_provider", slow_create)
+    test_runner = runner.TestRunner()
+    threads = [threading.Thread(target=test_runner._get_provider, args=("claude",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert created == ["claude"]
+
+def test_pool_strategy_from_env(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEYS", "sk-one,sk-two")
+    monkeypatch.delenv("POOL_STRATEGY", raising=False)
+    assert create_provider("claude").strategy == "least_loaded"
+    monkeypatch.setenv("POOL_STRATEGY", "round_robin")
+    assert create_provider("claude").strategy == "round_robin"
+    monkeypatch.setenv("POOL_STRATEGY", "random")
+    with pytest.raises(ValueError, match="Unknown pool strategy"):
+        create_provider("claude")
+
+def test_runner_reports_stats_of_pooled_providers(key, make_runner):
+    test_runner = make_runner()
+    test_runner.providers['openai'] = ProviderPool([key("a"), key("b")])
+    test_runner.providers['openai'].generate(prompt="p")
+    stats = test_runner.pool_stats()
+    assert list(stats) == ["openai"]
+    assert sum(s['requests'] for s in stats['openai']) == 1
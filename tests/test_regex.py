@@ -0,0 +1,29 @@
+import pytest
+from src.core.evaluator import Evaluator
+from src.core.models import Expectation, EvaluationType
+from src.utils.helpers import regex_risk, regex_search
+
+@pytest.mark.parametrize("pattern", [r"(a+)+$", r"(\w*)*x", r"(a|ab)*c", r"(a|aa)+$", r"(?:x+y?)+z"])
+def test_risky_patterns_are_flagged(pattern):
+    assert regex_risk(pattern)
+
+@pytest.mark.parametrize("pattern", [r"\d{3}-\d{3}-\d{4}", r"^hello\s+world$", r"(ab){2,5}", r"(a|b)+", r"[unclosed"])
+def test_ordinary_and_invalid_patterns_are_not_flagged(pattern):
+    assert regex_risk(pattern) is None
+
+def test_search_times_out():
+    with pytest.raises(TimeoutError):
+        regex_search(r"(a|aa)+$", "a" * 60 + "b", timeout=0.05)
+
+def test_timeout_is_an_evaluation_error(monkeypatch):
+    monkeypatch.setattr(Evaluator, "regex_timeout", 0.05)
+    passed, (result,) = Evaluator.evaluate("a" * 60 + "b", [Expectation(type=EvaluationType.REGEX, value=r"(a|aa)+$")])
+    assert passed is False
+    assert result['status'] == "error"
+    assert result['error'] == "Regex timed out after 0.05s"
+
+def test_invalid_pattern_is_an_evaluation_error():
+    passed, (result,) = Evaluator.evaluate("text", [Expectation(type=EvaluationType.REGEX, value="[unclosed")])
+    assert passed is False
+    assert result['status'] == "error"
+    assert result['error'].startswith("Invalid regex")
@@ -0,0 +1,85 @@
+import threading
+from datetime import datetime
+from src.storage.manager import StorageManager
+from src.storage import result_index
+from src.storage.result_index import ResultIndex
+
+def test_refresh_indexes_only_appended_results(tmp_path, make_result):
+    storage = StorageManager(str(tmp_path))
+    storage.save_results([make_result("a", "m1", True), make_result("b", "m1", False)])
+    index = ResultIndex(storage)
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+    storage.save_result(make_result("c", "m2", None, minutes=1))
+    assert index.refresh() == 1
+    assert len(index) == 3
+    assert index.counts() == {'total': 3, 'passed': 1, 'failed': 1, 'manual': 1}
+    assert index.distinct('model') == ["m1", "m2"]
+
+def test_refresh_reindexes_rewritten_file(tmp_path, make_result):
+    storage = StorageManager(str(tmp_path))
+    storage.save_results([make_result("a", "m1", True), make_result("b", "m1", True)])
+    index = ResultIndex(storage)
+    index.refresh()
+    storage.results_file.write_text("")
+    storage.save_result(make_result("c", "m1", False))
+    assert index.refresh() == 1
+    assert [index.row(i)['test_name'] for i in range(len(index))] == ["c"]
+
+def test_filter_combines_conditions_newest_first(tmp_path, make_result):
+    storage = StorageManager(str(tmp_path))
+    storage.save_results([
+        make_result("a", "m1", True, run_id="r1", minutes=0),
+        make_result("b", "m2", False, run_id="r1", minutes=1),
+        make_result("c", "m1", False, run_id="r2", minutes=2),
+        make_result("d", "m1", None, run_id="r2", minutes=3),
+    ])
+    index = ResultIndex(storage)
+    index.refresh()
+    names = lambda rows: [index.row(i)['test_name'] for i in rows]
+    assert names(index.filter()) == ["d", "c", "b", "a"]
+    assert names(index.filter(statuses=[False])) == ["c", "b"]
+    assert names(index.filter(statuses=[False, None], models=["m1"])) == ["d", "c"]
+    assert names(index.filter(run_ids=["r1"], test_names=["a", "unknown"])) == ["a"]
+    assert names(index.filter(models=["unknown"])) == []
+    assert [result['test_name'] for result in index.load_many(index.filter(run_ids=["r2"]))] == ["c", "d"]
+
+def test_runs_summarizes_each_run(tmp_path, make_result):
+    storage = StorageManager(str(tmp_path))
+    first = make_result("a", "m1", True, run_id="r1", minutes=0)
+    storage.save_results([
+        first,
+        make_result("b", "m1", False, run_id="r1", minutes=1),
+        make_result("a", "m1", True, run_id="r2", minutes=5),
+    ])
+    index = ResultIndex(storage)
+    index.refresh()
+    assert [(r['run_id'], r['results'], r['passed']) for r in index.runs()] == [("r2", 1, 1), ("r1", 2, 1)]
+    assert index.runs()[1]['started'] == first.timestamp.isoformat()
+
+def test_refresh_while_runs_is_summarizing(tmp_path, make_result, monkeypatch):
+    storage = StorageManager(str(tmp_path))
+    storage.save_result(make_result("a", "m1", True))
+    index = ResultIndex(storage)
+    index.refresh()
+    reading, refreshed = threading.Event(), threading.Event()
+
+    class SlowDatetime(datetime):
+        @classmethod
+        def fromtimestamp(cls, timestamp):
+            # Pause runs() mid-summary until refresh() has run (or is waiting on the lock)
+            reading.set()
+            refreshed.wait(0.2)
+            return datetime.fromtimestamp(timestamp)
+
+    monkeypatch.setattr(result_index, "datetime", SlowDatetime)
+    summaries = []
+    reader = threading.Thread(target=lambda: summaries.extend(index.runs()))
+    reader.start()
+    reading.wait()
+    storage.save_result(make_result("b", "m1", True))
+    # Would raise BufferError if runs() still held views over the arrays
+    assert index.refresh() == 1
+    refreshed.set()
+    reader.join()
+    assert len(summaries) == 1 and len(index) == 2
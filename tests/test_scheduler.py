@@ -0,0 +1,29 @@
+from src.core import models
+from src.core.scheduler import prioritize, result_history
+
+def test_smoke_then_failure_likelihood_then_latency(make_test_cases, make_result):
+    tests = make_test_cases(5)
+    tests[4].tags = ["smoke"]
+    stored = lambda test_id, **fields: make_result(test_id, **fields).model_dump(mode="json")
+    history = result_history(
+        [stored("0", passed=True, execution_time=2.0)] * 4
+        + [stored("1", passed=False)] * 3
+        + [stored("3", passed=True, execution_time=0.5)] * 4
+    )
+    assert history['1'] == {'runs': 3, 'failures': 3, 'mean_latency': 1.0, 'mean_response_length': 1}
+    # 4 (smoke), 1 (always fails), 2 (no history), then always-passing 3 before the slower 0
+    assert [test_case.id for test_case in prioritize(tests, history)] == ["4", "1", "2", "3", "0"]
+
+def test_fail_fast_stops_after_n_failures(make_runner, fake_provider, make_test_cases):
+    provider = fake_provider(reply="ok", delay=0.05)
+    runner = make_runner(provider)
+    failing = make_test_cases(10, expectations=[models.Expectation(type="contains", value="missing")])
+    results = runner.run_tests(failing, run_id="run", max_workers=2, fail_fast=3)
+    assert 3 <= len(results) < 10
+    assert len(provider.calls) < 10
+    assert [result.test_id for result in results] == sorted((result.test_id for result in results), key=int)
+    assert all(result.passed is False and result.run_id == "run" for result in results)
+
+def test_fail_fast_runs_everything_without_failures(make_runner, make_test_cases):
+    results = make_runner().run_tests(make_test_cases(5), max_workers=2, fail_fast=1)
+    assert len(results) == 5
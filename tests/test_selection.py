@@ -0,0 +1,47 @@
+from datetime import timedelta
+from src.core import models
+from src.core.selection import expectations_fingerprint, generation_fingerprint, select_tests
+from src.storage.manager import StorageManager
+
+def _checks(value):
+    return [models.Expectation(type="contains", value=value)]
+
+def test_split_into_skip_reevaluate_and_run(tmp_path, make_runner, make_test_cases):
+    storage = StorageManager(str(tmp_path))
+    runner = make_runner()
+    passing, failing, checked, changed = make_test_cases(4, expectations=_checks("reply"))
+    failing.expectations = _checks("missing")
+    for test_case in (passing, failing, checked, changed):
+        test_case.prompt = f"p{test_case.id}"
+    storage.save_results(runner.run_tests([passing, failing, checked, changed]))
+
+    checked.expectations = _checks("reply to")
+    changed.prompt = "new prompt"
+    new = models.TestCase(id="4", name="t4", prompt="p4")
+    selection = select_tests([passing, failing, checked, changed, new], storage.iter_results())
+
+    assert [(test_case.id, result['passed']) for test_case, result in selection['skip']] == [("0", True)]
+    assert [(test_case.id, result['passed']) for test_case, result in selection['reevaluate']] == [("2", True)]
+    assert [test_case.id for test_case in selection['run']] == ["1", "3", "4"]
+
+def test_latest_result_wins_and_errors_are_ignored(make_test_cases, make_result):
+    test_case, = make_test_cases(1)
+    fingerprints = {
+        'fingerprint': generation_fingerprint(test_case),
+        'expectations_fingerprint': expectations_fingerprint(test_case)
+    }
+    results = [
+        make_result("t0", passed=False, minutes=0, **fingerprints).model_dump(mode="json"),
+        make_result("t0", passed=True, minutes=1, **fingerprints).model_dump(mode="json"),
+        make_result("t0", passed=False, minutes=2, error="timeout", **fingerprints).model_dump(mode="json"),
+    ]
+    (_, result), = select_tests([test_case], results)['skip']
+    assert result['passed'] is True
+
+def test_results_older_than_max_age_are_rerun(make_test_cases, make_result):
+    test_case, = make_test_cases(1)
+    stored = make_result(
+        "t0", fingerprint=generation_fingerprint(test_case), expectations_fingerprint=expectations_fingerprint(test_case)
+    ).model_dump(mode="json")
+    assert len(select_tests([test_case], [stored])['skip']) == 1
+    assert select_tests([test_case], [stored], max_age=timedelta(days=1))['run'] == [test_case]
@@ -0,0 +1,22 @@
+import json
+from src.storage.manager import StorageManager
+
+LEGACY_RESULT = {
+    'test_id': "a", 'test_name': "a", 'prompt': "p", 'response': "r", 'provider': "claude",
+    'model': "m", 'passed': True, 'execution_time': 1.0, 'timestamp': "2025-01-01T00:00:00"
+}
+
+def test_legacy_results_are_migrated(tmp_path):
+    (tmp_path / "results.json").write_text(json.dumps([LEGACY_RESULT]))
+    storage = StorageManager(str(tmp_path))
+    assert [result['test_id'] for result in storage.iter_results()] == ["a"]
+    assert storage.load_text(next(storage.iter_results()), 'response') == "r"
+    assert (tmp_path / "results.json.migrated").exists()
+    # Opening the storage again doesn't duplicate them
+    assert len(list(StorageManager(str(tmp_path)).iter_results())) == 1
+
+def test_legacy_results_are_migrated_next_to_existing_results_file(tmp_path):
+    # E.g. a checkout that already has an (empty) results.jsonl
+    (tmp_path / "results.jsonl").write_text("")
+    (tmp_path / "results.json").write_text(json.dumps([LEGACY_RESULT]))
+    assert len(list(StorageManager(str(tmp_path)).iter_results())) == 1
@@ -0,0 +1,49 @@
+from src.core import models
+
+def test_replies_stream_only_for_ttft_or_rate_checks(make_runner, fake_provider):
+    provider = fake_provider(reply="x" * 400)
+    runner = make_runner(provider)
+    plain = models.TestCase(id="a", name="a", prompt="plain", expectations=[models.Expectation(type="latency_max", value=5)])
+    timed = models.TestCase(id="b", name="b", prompt="timed", expectations=[models.Expectation(type="ttft_max", value=5)])
+    plain_result, timed_result = runner.run_tests([plain, timed])
+    assert [(call['content'], call['streamed']) for call in provider.calls] == [("plain", False), ("timed", True)]
+    assert plain_result.samples[0]['ttft'] is None
+    assert timed_result.samples[0]['ttft'] is not None
+    assert plain_result.passed and timed_result.passed
+
+def test_no_rate_for_reply_in_one_chunk(make_runner, fake_provider):
+    runner = make_runner(fake_provider(reply="x" * 400, ttft=0.05))
+    test_case = models.TestCase(
+        id="a", name="a", prompt="p", expectations=[models.Expectation(type="tokens_per_sec_min", value=1)]
+    )
+    result, = runner.run_tests([test_case])
+    assert result.samples[0]['tokens_per_sec'] is None
+    assert result.evaluation_results[0]['error'] == "No tokens_per_sec recorded for this response"
+
+def test_rate_over_generation_after_first_token(make_runner, fake_provider):
+    runner = make_runner(fake_provider(reply="x" * 400, ttft=0.05, generation=0.2))
+    test_case = models.TestCase(
+        id="a", name="a", prompt="p", expectations=[models.Expectation(type="tokens_per_sec_min", value=100)]
+    )
+    result, = runner.run_tests([test_case])
+    # 100 tokens (400 characters) over ~0.2s
+    assert 300 < result.samples[0]['tokens_per_sec'] < 500
+    assert result.passed
+
+def test_shared_turn_streams_if_any_conversation_times_it(make_runner, fake_provider):
+    provider = fake_provider(reply="x" * 400)
+    runner = make_runner(provider)
+    conversations = [
+        models.TestCase(
+            id=id, name=id, prompt="hello", expectations=expectations,
+            turns=[models.Turn(content=follow_up, expectations=[models.Expectation(type="contains", value="x")])]
+        )
+        for id, follow_up, expectations in (
+            ("a", "one", [models.Expectation(type="ttft_max", value=5)]),
+            ("b", "two", [models.Expectation(type="contains", value="x")]),
+        )
+    ]
+    results = runner.run_tests(conversations)
+    assert sorted((call['content'], call['streamed']) for call in provider.calls) == [("hello", True), ("one", False), ("two", False)]
+    assert all(result.passed for result in results)
+    assert results[1].turn_results[0]['ttft'] is not None
@@ -0,0 +1,91 @@
+import threading
+import time
+from src.core import models
+from src.core.work_queue import WorkQueue
+from src.core.worker import Worker
+from src.storage.manager import StorageManager
+
+def test_claim_leases_one_shard(tmp_path, make_test_cases):
+    queue = WorkQueue(str(tmp_path / "q.db"))
+    queue.submit_run("run", make_test_cases(5), shard_size=3)
+    assert [task[2].id for task in queue.claim("w1")] == ["0", "1", "2"]
+    assert [task[2].id for task in queue.claim("w2")] == ["3", "4"]
+    assert queue.run_progress("run")['leased'] == 5
+
+def test_idle_worker_steals_unstarted_half(tmp_path, make_test_cases):
+    queue = WorkQueue(str(tmp_path / "q.db"))
+    queue.submit_run("run", make_test_cases(4), shard_size=4)
+    tasks = queue.claim("w1")
+    assert queue.start(tasks[0][0], "w1")
+    stolen = queue.claim("w2")
+    # One task is running; the unstarted tail is split
+    assert [task[2].id for task in stolen] == ["3"]
+    assert not queue.start(stolen[0][0], "w1")
+    assert queue.start(stolen[0][0], "w2")
+
+def test_expired_lease_returns_tasks_to_queue(tmp_path, make_test_cases):
+    queue = WorkQueue(str(tmp_path / "q.db"), lease_timeout=0.05, max_attempts=2)
+    queue.submit_run("run", make_test_cases(1))
+    (task_id, _, _), = queue.claim("w1")
+    assert queue.start(task_id, "w1")
+    time.sleep(0.1)
+    assert [task[0] for task in queue.claim("w2")] == [task_id]
+    # The first worker's lease was taken over, so its result is refused
+    assert queue.start(task_id, "w2")
+    assert not queue.complete(task_id, "w1")
+    assert queue.complete(task_id, "w2")
+    assert queue.is_drained("run")
+
+def test_task_fails_after_max_attempts(tmp_path, make_test_cases):
+    queue = WorkQueue(str(tmp_path / "q.db"), lease_timeout=0.01, max_attempts=1)
+    queue.submit_run("run", make_test_cases(1))
+    (task_id, _, _), = queue.claim("w1")
+    queue.start(task_id, "w1")
+    time.sleep(0.05)
+    assert queue.claim("w2") == []
+    assert queue.run_progress("run")['failed'] == 1
+
+class SlowRunner:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    def run_test(self, test_case, run_id=None, budget=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        return models.TestResult(
+            test_id=test_case.id, test_name=test_case.name, prompt=test_case.prompt, response="r",
+            provider=test_case.provider, model=test_case.model, execution_time=self.delay, run_id=run_id
+        )
+
+def test_heartbeat_keeps_lease_through_long_call(tmp_path, make_test_cases):
+    queue = WorkQueue(str(tmp_path / "q.db"), lease_timeout=0.3)
+    queue.submit_run("run", make_test_cases(1))
+    storage = StorageManager(str(tmp_path / "data"))
+    worker = Worker(queue, storage, worker_id="w1")
+    worker.runner = SlowRunner(delay=1.0)
+
+    thread = threading.Thread(target=worker.run, kwargs={'poll_interval': 0.05, 'exit_when_idle': True})
+    thread.start()
+    time.sleep(0.7)
+    # The call has outlasted the lease timeout, but the heartbeat kept the lease
+    assert queue.claim("w2") == []
+    thread.join()
+    assert worker.runner.calls == 1
+    assert queue.run_progress("run")['done'] == 1
+    assert len(list(storage.iter_results())) == 1
+
+class CappedRunner:
+    def run_test(self, test_case, run_id=None, budget=None):
+        # What TestRunner returns once the run's spend cap stopped the test
+        return None
+
+def test_tests_stopped_by_spend_cap_are_skipped(tmp_path, make_test_cases):
+    queue = WorkQueue(str(tmp_path / "q.db"))
+    queue.submit_run("run", make_test_cases(2), max_cost=0.0)
+    storage = StorageManager(str(tmp_path / "data"))
+    worker = Worker(queue, storage, worker_id="w1")
+    worker.runner = CappedRunner()
+    assert worker.run(poll_interval=0.01, exit_when_idle=True) == 0
+    assert queue.run_progress("run")['skipped'] == 2
+    assert list(storage.iter_results()) == []
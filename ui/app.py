@@ -31,30 +31,30 @@ Navigate using the sidebar to get started! 👈
 
 # Display quick stats
 from src.storage.manager import StorageManager
+from ui.components.result_index import get_result_index
 
 storage = StorageManager()
 test_cases = storage.get_all_test_cases()
-results = storage.get_all_results()
+index = get_result_index()
+counts = index.counts()
 
 col1, col2, col3, col4 = st.columns(4)
 with col1:
     st.metric("Total Test Cases", len(test_cases))
 with col2:
-    st.metric("Total Runs", len(results))
+    st.metric("Total Runs", counts['total'])
 with col3:
-    passed = sum(1 for r in results if r.get('passed') == True)
-    st.metric("Tests Passed", passed)
+    st.metric("Tests Passed", counts['passed'])
 with col4:
-    failed = sum(1 for r in results if r.get('passed') == False)
-    st.metric("Tests Failed", failed)
+    st.metric("Tests Failed", counts['failed'])
 
 # Show recent results
-if results:
+if counts['total']:
     st.subheader("Recent Test Runs")
-    recent = sorted(results, key=lambda x: x.get('timestamp', ''), reverse=True)[:5]
+    recent = [index.row(i) for i in index.filter()[:5]]
     
     for result in recent:
-        with st.expander(f"📋 {result['test_name']} - {result.get('timestamp', 'N/A')[:19]}"):
+        with st.expander(f"📋 {result['test_name']} - {result['timestamp'].isoformat()[:19]}"):
             status = "✅ Passed" if result.get('passed') else "❌ Failed" if result.get('passed') is False else "⚠️ Manual Review"
             st.write(f"**Status:** {status}")
             st.write(f"**Model:** {result['model']}")
@@ -0,0 +1,8 @@
+import streamlit as st
+from src.core.jobs import JobManager
+from src.storage.manager import StorageManager
+
+@st.cache_resource
+def get_job_manager(data_dir: str = "data") -> JobManager:
+    """One background job manager per data directory, shared by all sessions so runs outlive the page"""
+    return JobManager(StorageManager(data_dir))
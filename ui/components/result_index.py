@@ -0,0 +1,13 @@
+import streamlit as st
+from src.storage.manager import StorageManager
+from src.storage.result_index import ResultIndex
+
+@st.cache_resource
+def _shared_index(data_dir: str) -> ResultIndex:
+    return ResultIndex(StorageManager(data_dir))
+
+def get_result_index(data_dir: str = "data") -> ResultIndex:
+    """One compact result index per data directory, shared by all pages and sessions and kept up to date"""
+    index = _shared_index(data_dir)
+    index.refresh()
+    return index
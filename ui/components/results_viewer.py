@@ -16,11 +16,11 @@ def color_status(status):
     else:
         return "⚪"
 
-def show_results(results_path="data/results.json"):
+def show_results(results_path="data/results.jsonl"):
     st.header("Test Results")
     try:
         with open(results_path, "r", encoding="utf-8") as f:
-            results = json.load(f)
+            results = [json.loads(line) for line in f if line.strip()]
         if not results:
             st.info("No results found.")
             return
@@ -3,11 +3,15 @@ import sys
 from pathlib import Path
 from datetime import datetime
 import uuid
+import json
+import os
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.storage.manager import StorageManager
-from src.core.models import TestCase, Expectation, EvaluationType
+from src.core.models import TestCase, Expectation, EvaluationType, Turn
+from src.core.evaluator import Evaluator, LATENCY_TYPES
+from src.utils.helpers import validate_regex, regex_risk
 
 st.set_page_config(page_title="Test Cases", page_icon="📝", layout="wide")
 
@@ -81,6 +85,17 @@ with st.sidebar:
             "Tags (comma-separated)",
             value=", ".join(test_data.get('tags', [])) if test_data else ""
         )
+
+        samples = st.number_input(
+            "Samples (generate a single-prompt test several times for latency percentiles)",
+            1, 50,
+            value=test_data.get('samples', 1) if test_data else 1
+        )
+
+        structured_output = st.checkbox(
+            "Structured output (use provider JSON/tool mode for json_valid/json_schema checks)",
+            value=test_data.get('structured_output', False) if test_data else False
+        )
         
         st.subheader("Expectations")
         st.caption("Add automated checks for the response")
@@ -105,7 +120,10 @@ with st.sidebar:
                 exp_value = st.text_input(
                     "Value",
                     key=f"exp_value_{i}",
-                    value=str(exp_data.get('value', '')) if exp_data else ""
+                    value=(
+                        json.dumps(exp_data['value']) if isinstance(exp_data.get('value'), (dict, list))
+                        else str(exp_data.get('value', ''))
+                    ) if exp_data else ""
                 )
             
             exp_desc = st.text_input(
@@ -120,6 +138,23 @@ with st.sidebar:
                 'description': exp_desc
             })
         
+        st.subheader("Follow-up Turns")
+        st.caption("Make this a conversation: each turn is another user message, checked against the reply to it. "
+                   "The prompt and expectations above are the first turn.")
+
+        num_turns = st.number_input("Number of Follow-up Turns", 0, 10, value=len(test_data.get('turns', [])) if test_data else 0)
+
+        turns = []
+        for i in range(num_turns):
+            turn_data = test_data['turns'][i] if test_data and i < len(test_data.get('turns', [])) else {}
+            turn_content = st.text_area(f"Turn {i+2} Message", key=f"turn_content_{i}", value=turn_data.get('content', ''), height=80)
+            turn_expectations = st.text_area(
+                f"Turn {i+2} Expectations (JSON list, e.g. [{{\"type\": \"contains\", \"value\": \"refund\"}}])",
+                key=f"turn_exp_{i}",
+                value=json.dumps(turn_data['expectations']) if turn_data.get('expectations') else ""
+            )
+            turns.append({'content': turn_content, 'expectations': turn_expectations})
+        
         submitted = st.form_submit_button("💾 Save Test Case", use_container_width=True)
         
         if submitted:
@@ -136,6 +171,45 @@ with st.sidebar:
                         )
                         for exp in expectations
                     ]
+
+                    turn_objects = []
+                    for i, turn in enumerate(turns):
+                        if not turn['content'].strip():
+                            raise ValueError(f"Turn {i+2} needs a message")
+                        turn_objects.append(Turn(
+                            content=turn['content'],
+                            expectations=json.loads(turn['expectations']) if turn['expectations'].strip() else []
+                        ))
+
+                    # Parse and validate values here so mistakes surface at save time, not mid-run
+                    warnings = []
+                    for exp in exp_objects + [exp for turn in turn_objects for exp in turn.expectations]:
+                        if exp.type == EvaluationType.JSON_SCHEMA:
+                            exp.value = Evaluator.schema_value(exp.value)
+                            Evaluator.get_schema_validator(exp.value)
+                        elif exp.type in (EvaluationType.LENGTH_MIN, EvaluationType.LENGTH_MAX):
+                            exp.value = int(exp.value)
+                        elif exp.type in LATENCY_TYPES:
+                            if isinstance(exp.value, str):
+                                exp.value = json.loads(exp.value)
+                            Evaluator.latency_params(exp.type, exp.value)
+                        elif exp.type == EvaluationType.SEMANTIC_SIMILARITY:
+                            exp.value = Evaluator.dict_value(exp.value)
+                            Evaluator.semantic_params(exp.value)
+                        elif exp.type == EvaluationType.JUDGE:
+                            exp.value = Evaluator.dict_value(exp.value)
+                            Evaluator.judge_rubric(exp.value)
+                        elif exp.type == EvaluationType.REGEX:
+                            if not validate_regex(exp.value):
+                                raise ValueError(f"Invalid regex: {exp.value}")
+                            # The heuristic has false positives, and REGEX_TIMEOUT bounds a slow match,
+                            # so risky patterns are flagged but still saved
+                            risk = regex_risk(exp.value)
+                            if risk and os.getenv("REGEX_ENGINE", "regex") != "re2":
+                                warnings.append(
+                                    f"Regex '{exp.value}' may backtrack catastrophically ({risk}). "
+                                    "It will fail with a timeout error if a match takes longer than REGEX_TIMEOUT."
+                                )
                     
                     # Create test case
                     test_case = TestCase(
@@ -147,13 +221,20 @@ with st.sidebar:
                         system_prompt=system_prompt or None,
                         temperature=temperature,
                         max_tokens=max_tokens,
+                        structured_output=structured_output,
+                        samples=samples,
                         expectations=exp_objects,
+                        turns=turn_objects,
                         tags=[t.strip() for t in tags.split(",") if t.strip()]
                     )
                     
                     storage.save_test_case(test_case)
                     st.success(f"✅ Test case {'updated' if editing else 'created'} successfully!")
-                    st.rerun()
+                    for warning in warnings:
+                        st.warning(f"⚠️ {warning}")
+                    # Keep the warnings on screen instead of rerunning straight away
+                    if not warnings:
+                        st.rerun()
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
 
@@ -207,6 +288,12 @@ else:
                 st.markdown("**Expectations:**")
                 for i, exp in enumerate(tc['expectations'], 1):
                     st.caption(f"{i}. {exp['type']}: {exp['value']}")
+
+            for i, turn in enumerate(tc.get('turns', []), 2):
+                st.markdown(f"**Turn {i}:**")
+                st.code(turn['content'], language=None)
+                for exp in turn.get('expectations', []):
+                    st.caption(f"- {exp['type']}: {exp['value']}")
             
             # Delete button
             if st.button(f"🗑️ Delete", key=f"delete_{tc['id']}"):
@@ -5,16 +5,75 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.storage.manager import StorageManager
-from src.core.runner import TestRunner
-from src.core.models import TestCase, Expectation
-from datetime import datetime
+from src.core.models import TestCase, TestResult
+from src.core.scheduler import result_history
+from src.core.budget import preflight
+from src.core.jobs import ACTIVE_STATES
+from ui.components.job_manager import get_job_manager
+from ui.components.result_index import get_result_index
+import time
 
 st.set_page_config(page_title="Run Tests", page_icon="▶️", layout="wide")
 
 st.title("▶️ Run Tests")
 
 storage = StorageManager()
-runner = TestRunner()
+jobs = get_job_manager()
+
+def show_result(result):
+    if result.error:
+        st.error(f"❌ Error: {result.error}")
+        return
+
+    # Status
+    if result.passed is True:
+        st.success("✅ Test Passed")
+    elif result.passed is False:
+        st.error("❌ Test Failed")
+    else:
+        st.warning("⚠️ Manual Review Required")
+    if result.reused_from_run:
+        st.caption(f"♻️ Re-evaluated the response from run {result.reused_from_run} (expectations changed, model not called)")
+
+    # Metrics
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Execution Time", f"{result.execution_time:.2f}s")
+    with col2:
+        st.metric("Model", result.model)
+    with col3:
+        st.metric("Provider", result.provider)
+    if result.samples and result.samples[0].get('ttft') is not None:
+        ttfts = [s['ttft'] for s in result.samples if s.get('ttft') is not None]
+        rates = [s['tokens_per_sec'] for s in result.samples if s.get('tokens_per_sec')]
+        samples = f" (mean of {len(result.samples)} samples)" if len(result.samples) > 1 else ""
+        st.caption(
+            f"⏱️ Time to first token: {sum(ttfts) / len(ttfts):.2f}s"
+            + (f", {sum(rates) / len(rates):.0f} tokens/s" if rates else "") + samples
+        )
+    if result.judge_time:
+        st.caption(f"⚖️ Judge grading: {result.judge_time:.2f}s, ${result.judge_cost:.4f} (not included in execution time)")
+
+    # Prompt and response (each turn's message and reply for conversations)
+    if result.turn_results:
+        for turn in result.turn_results:
+            shared = " · shared prefix" if turn['shared'] else ""
+            st.markdown(f"**Turn {turn['turn'] + 1}** ({turn['latency']:.2f}s{shared})")
+            st.code(turn['content'], language=None)
+            st.write(turn['response'])
+    else:
+        st.markdown("**Prompt:**")
+        st.code(result.prompt, language=None)
+        st.markdown("**Response:**")
+        st.write(result.response)
+
+    # Evaluation Results
+    if result.evaluation_results:
+        st.markdown("**Evaluation Results:**")
+        for eval_result in result.evaluation_results:
+            status_icon = "✅" if eval_result['passed'] else "❌" if eval_result['passed'] is False else "⚠️"
+            turn = f"Turn {eval_result['turn'] + 1}: " if 'turn' in eval_result else ""
+            st.caption(f"{status_icon} {turn}{eval_result['description']} - {eval_result['details']}")
 
 # Load test cases
 test_cases = storage.get_all_test_cases()
@@ -39,93 +98,125 @@ else:
     else:
         selected_tests = [tc['id'] for tc in test_cases]
     
+    only_changed = st.checkbox(
+        "Only run changed tests",
+        value=False,
+        help="Skip tests whose prompt, model and parameters are unchanged since a passing result; "
+             "re-check stored responses when only the expectations changed"
+    )
+    max_age_hours = 0
+    if only_changed:
+        max_age_hours = st.number_input("Reuse results from the last N hours (0 = any age)", min_value=0, value=24)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        prioritized = st.checkbox(
+            "Run likely failures first",
+            value=True,
+            help="Tests tagged 'smoke' first, then by historical failure rate, then fastest first"
+        )
+    with col2:
+        fail_fast = st.number_input("Stop after N failures (0 = run all)", min_value=0, value=0)
+    with col3:
+        spend_cap = st.number_input("Spend cap in USD (0 = none)", min_value=0.0, value=0.0, step=0.5)
+    max_workers = st.slider("Concurrent calls", 1, 16, value=4, help="Model calls in flight at once within a run")
+
+    def selected_test_cases():
+        """Convert the selected tests to TestCase objects"""
+        # Same construction as `worker submit`, so every stored field (samples, tags, ...) is kept
+        # and generation fingerprints match between UI and worker runs
+        return [TestCase(**storage.get_test_case(test_id)) for test_id in selected_tests]
+
+    def estimate_run(test_cases, history):
+        return preflight(test_cases, jobs.runner.token_counter, history)
+
+    if st.button("🧮 Estimate Cost", disabled=len(selected_tests) == 0):
+        estimate = estimate_run(selected_test_cases(), result_history(storage.iter_results()))
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Input Tokens", f"{estimate['input_tokens']:,}")
+        with col2:
+            st.metric("Expected Cost", f"${estimate['expected_cost']:.4f}")
+        with col3:
+            st.metric("Max Cost", f"${estimate['max_cost']:.4f}", help="If every call uses all of max_tokens")
+        with col4:
+            duration = estimate['expected_duration']
+            st.metric("Expected Duration", f"{duration:.0f}s" if duration is not None else "unknown")
+        if estimate['without_history']:
+            st.caption(f"{estimate['without_history']} test(s) have no past results; their output is assumed to use max_tokens")
+        st.dataframe(estimate['tests'], use_container_width=True)
+
     if st.button("▶️ Run Selected Tests", type="primary", disabled=len(selected_tests) == 0):
-        st.divider()
-        st.subheader("Test Results")
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        results_container = st.container()
-        
-        for idx, test_id in enumerate(selected_tests):
-            # Update progress
-            progress = (idx) / len(selected_tests)
-            progress_bar.progress(progress)
-            
-            # Get test case
-            test_data = storage.get_test_case(test_id)
-            status_text.text(f"Running: {test_data['name']}...")
-            
-            # Convert to TestCase object
-            expectations = [
-                Expectation(**exp) for exp in test_data.get('expectations', [])
-            ]
-            
-            test_case = TestCase(
-                id=test_data['id'],
-                name=test_data['name'],
-                prompt=test_data['prompt'],
-                provider=test_data['provider'],
-                model=test_data['model'],
-                system_prompt=test_data.get('system_prompt'),
-                temperature=test_data.get('temperature', 1.0),
-                max_tokens=test_data.get('max_tokens', 1024),
-                expectations=expectations,
-                tags=test_data.get('tags', [])
+        # Runs execute in the background, so they survive reruns and leaving the page
+        job_id = jobs.submit(
+            selected_test_cases(),
+            only_changed=only_changed,
+            max_age_hours=max_age_hours,
+            prioritized=prioritized,
+            fail_fast=fail_fast,
+            spend_cap=spend_cap,
+            max_workers=max_workers
+        )
+        st.success(f"Run {job_id} started in the background")
+
+st.divider()
+st.subheader("Runs")
+
+recent_jobs = jobs.list_jobs(limit=10)
+if not recent_jobs:
+    st.caption("No runs yet.")
+
+status_icons = {
+    "queued": "🕒", "running": "⏳", "completed": "✅",
+    "cancelled": "🛑", "failed": "❌", "interrupted": "⚠️"
+}
+for job in recent_jobs:
+    active = job['status'] in ACTIVE_STATES
+    with st.expander(f"{status_icons[job['status']]} Run {job['job_id']} - {job['status']}", expanded=active):
+        to_run = job['total'] - job['skipped']
+        st.progress(min(job['done'] / to_run, 1.0) if to_run else 1.0)
+
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric("Done", f"{job['done']}/{to_run}")
+        with col2:
+            st.metric("Passed", job['passed'])
+        with col3:
+            st.metric("Failed", job['failed'])
+        with col4:
+            st.metric("Skipped", job['skipped'], help="Unchanged since a passing result")
+        with col5:
+            st.metric("Spent", f"${job['spent']:.4f}")
+
+        if job['estimate']:
+            st.caption(
+                f"Pre-flight estimate: {job['estimate']['input_tokens']:,} input tokens, "
+                f"${job['estimate']['expected_cost']:.4f} expected (up to ${job['estimate']['max_cost']:.4f})"
             )
-            
-            # Run test
-            with results_container:
-                with st.expander(f"📋 {test_case.name}", expanded=True):
-                    result_placeholder = st.empty()
-                    
-                    with result_placeholder.container():
-                        st.info("⏳ Running test...")
-                    
-                    result = runner.run_test(test_case)
-                    
-                    # Save result
-                    storage.save_result(result)
-                    
-                    # Display result
-                    with result_placeholder.container():
-                        if result.error:
-                            st.error(f"❌ Error: {result.error}")
-                        else:
-                            # Status
-                            if result.passed is True:
-                                st.success("✅ Test Passed")
-                            elif result.passed is False:
-                                st.error("❌ Test Failed")
-                            else:
-                                st.warning("⚠️ Manual Review Required")
-                            
-                            # Metrics
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric("Execution Time", f"{result.execution_time:.2f}s")
-                            with col2:
-                                st.metric("Model", result.model)
-                            with col3:
-                                st.metric("Provider", result.provider)
-                            
-                            # Prompt
-                            st.markdown("**Prompt:**")
-                            st.code(result.prompt, language=None)
-                            
-                            # Response
-                            st.markdown("**Response:**")
-                            st.write(result.response)
-                            
-                            # Evaluation Results
-                            if result.evaluation_results:
-                                st.markdown("**Evaluation Results:**")
-                                for eval_result in result.evaluation_results:
-                                    status_icon = "✅" if eval_result['passed'] else "❌" if eval_result['passed'] is False else "⚠️"
-                                    st.caption(f"{status_icon} {eval_result['description']} - {eval_result['details']}")
-        
-        # Complete
-        progress_bar.progress(1.0)
-        status_text.text("✅ All tests completed!")
-        st.balloons()
\ No newline at end of file
+        if job['message']:
+            st.info(job['message'])
+        if job['error']:
+            st.error(f"❌ Error: {job['error']}")
+        if job['status'] == "interrupted":
+            st.warning("The process running this run stopped before it finished; results saved so far are kept")
+
+        if active and st.button("🛑 Cancel", key=f"cancel_{job['job_id']}"):
+            jobs.cancel(job['job_id'])
+            st.rerun()
+
+        if job['done'] and st.checkbox("Show results", key=f"results_{job['job_id']}", value=not active):
+            index = get_result_index()
+            for result in index.load_many(index.filter(run_ids=[job['job_id']])):
+                st.markdown(f"**📋 {result['test_name']}**")
+                show_result(TestResult(**storage.hydrate(result)))
+
+# Load over pooled API keys (only shown with several keys per provider)
+for provider_name, stats in jobs.runner.pool_stats().items():
+    st.caption(f"{provider_name} API keys")
+    st.dataframe(stats, use_container_width=True)
+
+# Poll for progress while runs are active
+if any(job['status'] in ACTIVE_STATES for job in recent_jobs):
+    if st.checkbox("Auto-refresh", value=True):
+        time.sleep(2)
+        st.rerun()
@@ -2,40 +2,52 @@ import streamlit as st
 import sys
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.storage.manager import StorageManager
+from src.storage.analytics import ResultsAnalytics
+from src.core.compare import compare_runs
+from src.core.latency import latency_gate, load_baseline, save_baseline
+from ui.components.result_index import get_result_index
 
 st.set_page_config(page_title="Results", page_icon="📊", layout="wide")
 
 st.title("📊 Test Results")
 
 storage = StorageManager()
-results = storage.get_all_results()
+analytics = ResultsAnalytics(storage)
+# Compact index of ids, status and timing; full results and text are read on demand
+index = get_result_index()
 
-if not results:
+if not len(index):
     st.info("No test results yet. Run some tests first!")
 else:
-    st.write(f"Total test runs: {len(results)}")
+    st.write(f"Total test runs: {len(index)}")
     
-    # Summary metrics
+    # Summary metrics (computed on the columnar analytics dataset)
     col1, col2, col3, col4 = st.columns(4)
     
-    passed = sum(1 for r in results if r.get('passed') == True)
-    failed = sum(1 for r in results if r.get('passed') == False)
-    manual = sum(1 for r in results if r.get('passed') is None)
-    avg_time = sum(r['execution_time'] for r in results) / len(results)
+    summary = analytics.summary()
+    total = summary['total'] or 1
     
     with col1:
-        st.metric("Passed", passed, f"{passed/len(results)*100:.1f}%")
+        st.metric("Passed", summary['passed'], f"{summary['passed']/total*100:.1f}%")
     with col2:
-        st.metric("Failed", failed, f"{failed/len(results)*100:.1f}%")
+        st.metric("Failed", summary['failed'], f"{summary['failed']/total*100:.1f}%")
     with col3:
-        st.metric("Manual Review", manual)
+        st.metric("Manual Review", summary['manual'])
     with col4:
-        st.metric("Avg Time", f"{avg_time:.2f}s")
+        st.metric("Avg Time", f"{summary['avg_time']:.2f}s")
+    
+    # Charts
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Pass Rate Over Time**")
+        st.line_chart(analytics.pass_rate_over_time())
+    with col2:
+        st.markdown("**Latency Percentiles by Model (s)**")
+        st.dataframe(analytics.latency_percentiles_by_model(), use_container_width=True)
     
     st.divider()
     
@@ -50,7 +62,7 @@ else:
         )
     
     with col2:
-        test_names = list(set(r['test_name'] for r in results))
+        test_names = index.distinct('test_name')
         filter_tests = st.multiselect(
             "Filter by Test",
             test_names,
@@ -58,33 +70,35 @@ else:
         )
     
     with col3:
-        models = list(set(r['model'] for r in results))
+        models = index.distinct('model')
         filter_models = st.multiselect(
             "Filter by Model",
             models,
             default=models
         )
     
-    # Filter results
-    filtered = results
-    
+    # Filter results (newest first)
     status_map = {
         "Passed": True,
         "Failed": False,
         "Manual Review": None
     }
-    filtered_status = [status_map[s] for s in filter_status]
-    filtered = [r for r in filtered if r.get('passed') in filtered_status]
-    filtered = [r for r in filtered if r['test_name'] in filter_tests]
-    filtered = [r for r in filtered if r['model'] in filter_models]
+    filtered = index.filter(
+        statuses=[status_map[s] for s in filter_status],
+        test_names=filter_tests,
+        models=filter_models
+    )
     
+    page_size = 50
+    pages = max(1, (len(filtered) + page_size - 1) // page_size)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) if pages > 1 else 1
     st.write(f"Showing {len(filtered)} result(s)")
     
-    # Sort by timestamp (newest first)
-    filtered = sorted(filtered, key=lambda x: x.get('timestamp', ''), reverse=True)
-    
-    # Display results
-    for result in filtered:
+    # Display results, loading the full records for this page only
+    page_rows = filtered[(page - 1) * page_size:page * page_size]
+    loaded = dict(zip(sorted(int(i) for i in page_rows), index.load_many(page_rows)))
+    for i in page_rows:
+        result = loaded[int(i)]
         status_icon = "✅" if result.get('passed') == True else "❌" if result.get('passed') == False else "⚠️"
         timestamp = result.get('timestamp', 'N/A')
         if timestamp != 'N/A':
@@ -106,26 +120,140 @@ else:
             if result.get('error'):
                 st.error(f"Error: {result['error']}")
             
-            st.markdown("**Prompt:**")
-            st.code(result['prompt'], language=None)
-            
-            st.markdown("**Response:**")
-            st.write(result['response'])
+            # Text lives in the blob store; only load it when asked for
+            if st.checkbox("Show prompt and response", key=f"text_{result.get('run_id')}_{result['test_id']}_{result.get('timestamp')}"):
+                # A conversation's prompt and final response are its first and last turns
+                for turn in map(storage.hydrate_turn, result.get('turn_results', [])):
+                    st.markdown(f"**Turn {turn['turn'] + 1}** ({turn['latency']:.2f}s)")
+                    st.code(turn['content'], language=None)
+                    st.write(turn['response'])
+
+                if not result.get('turn_results'):
+                    st.markdown("**Prompt:**")
+                    st.code(storage.load_text(result, 'prompt'), language=None)
+                    
+                    st.markdown("**Response:**")
+                    st.write(storage.load_text(result, 'response'))
             
             if result.get('evaluation_results'):
                 st.markdown("**Evaluation Results:**")
                 for eval_result in result['evaluation_results']:
                     status = "✅" if eval_result['passed'] else "❌" if eval_result['passed'] is False else "⚠️"
-                    st.caption(f"{status} {eval_result['description']} - {eval_result['details']}")
+                    turn = f"Turn {eval_result['turn'] + 1}: " if 'turn' in eval_result else ""
+                    st.caption(f"{status} {turn}{eval_result['description']} - {eval_result['details']}")
     
+    # Compare runs
+    st.divider()
+    st.subheader("🔀 Compare Runs")
+    runs = index.runs()
+
+    if len(runs) < 2:
+        st.caption("Run the test suite at least twice to compare runs.")
+    else:
+        run_labels = {r['run_id']: f"{r['run_id']} ({r['passed']}/{r['results']} passed)" for r in runs}
+        col1, col2 = st.columns(2)
+        with col1:
+            base_run = st.selectbox("Baseline run", list(run_labels), index=1, format_func=run_labels.get)
+        with col2:
+            head_run = st.selectbox("Compared run", list(run_labels), index=0, format_func=run_labels.get)
+
+        if st.button("Compare", disabled=base_run == head_run):
+            comparison = compare_runs(
+                index.load_many(index.filter(run_ids=[base_run, head_run])), base_run, head_run,
+                load_text=storage.load_text
+            )
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Compared", comparison['compared'])
+            with col2:
+                st.metric("Newly Failing", comparison['newly_failing'])
+            with col3:
+                st.metric("Slower", comparison['slower'])
+            with col4:
+                st.metric("Fixed", comparison['fixed'])
+
+            if not comparison['regressions']:
+                st.success("No regressions 🎉")
+
+            for regression in comparison['regressions']:
+                label = " + ".join(k.replace("_", " ") for k in regression['kinds'])
+                with st.expander(f"❌ {regression['test_name']} - {label}"):
+                    st.write(
+                        f"**Execution Time:** {regression['base_time']:.2f}s → {regression['head_time']:.2f}s "
+                        f"({regression['latency_delta']:+.2f}s)"
+                    )
+                    if regression['error']:
+                        st.error(f"Error: {regression['error']}")
+                    if regression['diff']:
+                        st.markdown("**Response Diff:**")
+                        st.code(regression['diff'], language="diff")
+                    else:
+                        st.caption("Response unchanged")
+
+    # Latency gate
+    st.divider()
+    st.subheader("⏱️ Latency Gate")
+    baseline_file = storage.data_dir / "latency_baseline.json"
+    baseline = load_baseline(baseline_file)
+    if baseline:
+        st.caption(f"Baseline: run {baseline['run_id']} ({len(baseline['tests'])} tests, saved {baseline['created'][:19]})")
+    else:
+        st.caption("No baseline yet. Set a run whose latencies are acceptable as the baseline.")
+
+    run_ids = [r['run_id'] for r in runs]
+    if run_ids:
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            gate_run = st.selectbox("Run", run_ids, key="gate_run")
+        with col2:
+            gate_threshold = st.number_input("Allowed p95 slowdown (%)", 0, 500, value=20) / 100
+        with col3:
+            gate_min_delta = st.number_input("Ignore slowdowns under (s)", 0.0, 10.0, value=0.1, step=0.1)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Set as Baseline"):
+                try:
+                    save_baseline(index.load_many(index.filter(run_ids=[gate_run])), gate_run, baseline_file)
+                    st.rerun()
+                except ValueError as e:
+                    st.error(str(e))
+        with col2:
+            check = st.button("Check Against Baseline", disabled=baseline is None or gate_run == baseline['run_id'])
+
+        if check:
+            outcome = latency_gate(
+                index.load_many(index.filter(run_ids=[gate_run])), gate_run, baseline,
+                threshold=gate_threshold, min_delta=gate_min_delta
+            )
+            if outcome['passed']:
+                st.success(f"No p95 latency regression across {outcome['compared']} test(s)")
+            elif not outcome['compared']:
+                st.error("The run has no tests in common with the baseline")
+            else:
+                st.error("p95 latency regressed")
+            cols = st.columns(max(len(outcome['metrics']), 1))
+            for col, (metric, m) in zip(cols, outcome['metrics'].items()):
+                with col:
+                    st.metric(
+                        f"p95 {'TTFT' if metric == 'ttft' else 'latency'}", f"{m['head']:.2f}s",
+                        f"{m['delta']:+.2f}s", delta_color="inverse"
+                    )
+                    st.caption(f"Baseline {m['base']:.2f}s ({m['base_samples']} → {m['head_samples']} samples)")
+            for r in outcome['regressions']:
+                st.caption(f"🐢 {r['test_name']}: p95 {r['metric']} {r['base']:.2f}s → {r['head']:.2f}s")
+
     # Export
     st.divider()
-    if st.button("📥 Export Results as JSON"):
-        import json
-        json_str = json.dumps(filtered, indent=2, default=str)
+    if st.button("📥 Export Results as Parquet"):
         st.download_button(
-            label="Download JSON",
-            data=json_str,
-            file_name=f"test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
-        )
\ No newline at end of file
+            label="Download Parquet",
+            data=analytics.to_parquet_bytes(
+                models=filter_models,
+                statuses=[status_map[s] for s in filter_status],
+                test_names=filter_tests
+            ),
+            file_name=f"test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet",
+            mime="application/vnd.apache.parquet"
+        )